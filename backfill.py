@@ -0,0 +1,345 @@
+"""
+Pre-explain every comic in the archives, so first views hit the cache.
+
+Walks the full archive of each source (every xkcd number, every monkeyuser
+index.json entry and every turnoff.us page), fetches each comic and explains
+it into the explanation cache the bot reads. Several comics are packed into
+each LLM request (see `Scraper.describe_comics`), so more of them fit into the
+rate limit. LLM calls run at backfill priority with bounded concurrency and a
+token budget, and back off when the model keeps failing (e.g. rate limited).
+
+The explanation cache itself is the record of what is done: every run skips
+the comics whose explanation is cached, so an interrupted run resumes where
+it stopped, and comics that expired from the cache or were evicted are
+explained again. Failure counts are kept in a JSON checkpoint, so comics that
+keep failing are given up on after a few runs.
+
+Usage (from the repository root, with the bot's .env files):
+    python backfill.py
+    python backfill.py --sources xkcd --concurrency 2 --tokens-per-minute 10000
+    python backfill.py --batch-size 1
+    python backfill.py --restart
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from dotenv import dotenv_values
+from scrapers.explanation_cache import ExplanationCache
+from scrapers.http_session import create_http_session
+from scrapers.llm_scheduler import LLMScheduler, Priority
+from scrapers.monkey_user_scraper import MonkeyUserScraper
+from scrapers.scraper import MAX_BATCH_SIZE
+from scrapers.turnoff_us_scraper import TurnOffUsScraper
+from scrapers.xkcd_scraper import XkcdScraper
+
+SCRAPERS = {
+    "xkcd": XkcdScraper,
+    "monkeyuser": MonkeyUserScraper,
+    "turnoff_us": TurnOffUsScraper,
+}
+# the checkpoint is written after this many changed failure counts, and on exit
+CHECKPOINT_EVERY = 10
+# a worker whose batch had a failure waits this long before the next, doubling up to
+# the maximum while failures continue
+FAILURE_BACKOFF = 5  # seconds
+MAX_FAILURE_BACKOFF = 300  # seconds
+
+logger = logging.getLogger("backfill")
+
+
+class Checkpoint:
+    """
+    Backfill failure counts per source, persisted as JSON.
+
+    Comics are identified by their catalog slug. Whether a comic is done is
+    not recorded here but looked up in the explanation cache, which can
+    expire or evict it; failed comics are retried until they have failed
+    `max_attempts` times.
+    """
+
+    def __init__(self, path: str, max_attempts: int, restart: bool = False):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._failures: dict[str, dict[str, int]] = {}
+        self._unsaved = 0
+
+        if not restart and os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            for source, progress in state.items():
+                self._failures[source] = progress.get("failures", {})
+
+    def gave_up(self, source: str, slug: str) -> bool:
+        return self._failures.get(source, {}).get(slug, 0) >= self.max_attempts
+
+    def done(self, source: str, slug: str):
+        if self._failures.get(source, {}).pop(slug, None) is not None:
+            self._changed()
+
+    def failed(self, source: str, slug: str):
+        failures = self._failures.setdefault(source, {})
+        failures[slug] = failures.get(slug, 0) + 1
+        self._changed()
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        state = {
+            source: {"failures": failures}
+            for source, failures in self._failures.items()
+        }
+        # write then rename, so an interruption never leaves a truncated file
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(state, f)
+        os.replace(temporary, self.path)
+        self._unsaved = 0
+
+    def _changed(self):
+        self._unsaved += 1
+        if self._unsaved >= CHECKPOINT_EVERY:
+            self.save()
+
+
+async def backfill_source(name: str, scraper, checkpoint: Checkpoint, args) -> dict:
+    archive = await scraper.list_archive()
+    pending = [
+        entry
+        for entry in archive
+        # animated comics are never explained
+        if not entry.animated
+        and not checkpoint.gave_up(name, entry.slug)
+        and not await scraper.is_explained(entry)
+    ]
+    if args.limit:
+        pending = pending[: args.limit]
+    logger.info(
+        "%s: %s comics in the archive, %s to explain", name, len(archive), len(pending)
+    )
+
+    counts = {"explained": 0, "skipped": 0, "failed": 0}
+    started = time.perf_counter()
+    entries = iter(pending)
+
+    async def explain(batch: list) -> list[bool]:
+        """Explain a batch of catalog entries; True for each finished one."""
+        comics = await asyncio.gather(
+            *(scraper.comic_from_entry(entry) for entry in batch)
+        )
+        # animated comics are never explained, so there is nothing to cache
+        explainable = [
+            comic for comic in comics if comic is not None and not comic.is_animated
+        ]
+        analyses = iter(
+            await scraper.describe_comics(
+                explainable, Priority.BACKFILL, batch_size=args.batch_size
+            )
+        )
+
+        finished = []
+        for comic in comics:
+            if comic is None:
+                finished.append(False)
+            elif comic.is_animated:
+                counts["skipped"] += 1
+                finished.append(True)
+            elif next(analyses).get("Core_concept") == "Error":
+                finished.append(False)
+            else:
+                counts["explained"] += 1
+                finished.append(True)
+        return finished
+
+    async def worker():
+        backoff = 0
+        # the iterator is shared, so every entry goes to exactly one worker
+        while batch := list(itertools.islice(entries, args.batch_size)):
+            try:
+                finished = await explain(batch)
+            except Exception as e:
+                logger.error("%s: Error backfilling %s: %s", name, batch[0].url, e)
+                finished = [False] * len(batch)
+
+            for entry, ok in zip(batch, finished):
+                if ok:
+                    checkpoint.done(name, entry.slug)
+                else:
+                    checkpoint.failed(name, entry.slug)
+                    counts["failed"] += 1
+                    logger.warning("%s: Failed to explain %s", name, entry.url)
+            if all(finished):
+                backoff = 0
+            else:
+                backoff = min(max(backoff * 2, FAILURE_BACKOFF), MAX_FAILURE_BACKOFF)
+                logger.warning("%s: Pausing %ss after failures", name, backoff)
+                await asyncio.sleep(backoff)
+
+            done = sum(counts.values())
+            # the final count is logged once every worker is done
+            crossed = (
+                done // args.progress_every > (done - len(batch)) // args.progress_every
+            )
+            if crossed and done < len(pending):
+                _log_progress(name, counts, len(pending), started)
+
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    _log_progress(name, counts, len(pending), started)
+    return counts
+
+
+def _log_progress(name: str, counts: dict, total: int, started: float):
+    finished = sum(counts.values())
+    elapsed = time.perf_counter() - started
+    rate = finished / elapsed if elapsed else 0.0
+    remaining = (total - finished) / rate if rate else 0.0
+    logger.info(
+        "%s: %s/%s done (%s explained, %s animated, %s failed), "
+        "%.1f comics/min, about %.0f min left",
+        name,
+        finished,
+        total,
+        counts["explained"],
+        counts["skipped"],
+        counts["failed"],
+        rate * 60,
+        remaining / 60,
+    )
+
+
+async def run(config: dict, args) -> dict:
+    os.environ["GROQ_API_KEY"] = config["GROQ_API_KEY"]
+    os.environ["IMAGE_LLM"] = config["IMAGE_LLM"]
+    os.environ["SEARCH_ENGINE"] = config.get("SEARCH_ENGINE", "duckduckgo")
+
+    explanation_cache = ExplanationCache(
+        path=os.path.join(config.get("CACHE_DIR", "cache"), "explanations.db"),
+        max_entries=int(config.get("EXPLANATION_CACHE_MAX_ENTRIES", 5000)),
+        ttl=float(config.get("EXPLANATION_CACHE_TTL_DAYS", 30)) * 86400,
+    )
+    # each worker queues at most one job per comic of its batch, when a
+    # failed batch is retried one comic at a time
+    llm_scheduler = LLMScheduler(
+        max_concurrency=args.concurrency,
+        tokens_per_minute=args.tokens_per_minute,
+        max_queue_depth=args.concurrency * args.batch_size,
+    )
+    checkpoint = Checkpoint(args.checkpoint, args.max_attempts, restart=args.restart)
+    session = create_http_session()
+    scraper_logger = logging.getLogger("backfill.scraper")
+    scraper_logger.setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    results = {}
+    try:
+        for name in args.sources:
+            scraper = SCRAPERS[name](
+                config=config,
+                logger=scraper_logger,
+                session=session,
+                explanation_cache=explanation_cache,
+                llm_scheduler=llm_scheduler,
+            )
+            try:
+                results[name] = await backfill_source(name, scraper, checkpoint, args)
+            finally:
+                await scraper.close()
+        entries = explanation_cache.stats()["entries"]
+        if entries >= explanation_cache.max_entries:
+            logger.warning(
+                "The explanation cache is full (%s entries); raise "
+                "EXPLANATION_CACHE_MAX_ENTRIES to keep the whole archive.",
+                entries,
+            )
+    finally:
+        checkpoint.save()
+        await session.close()
+        explanation_cache.close()
+    return results
+
+
+def parse_args(config: dict, argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sources",
+        nargs="+",
+        choices=list(SCRAPERS),
+        default=list(SCRAPERS),
+        help="archives to backfill (default: all)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=int(config.get("LLM_MAX_CONCURRENCY", 4)),
+        help="comics explained at once (default: LLM_MAX_CONCURRENCY)",
+    )
+    parser.add_argument(
+        "--tokens-per-minute",
+        type=int,
+        default=int(config.get("LLM_TOKENS_PER_MINUTE", 30000)),
+        help="estimated LLM token budget; lower it while the bot is running "
+        "(default: LLM_TOKENS_PER_MINUTE)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        choices=range(1, MAX_BATCH_SIZE + 1),
+        metavar="N",
+        default=4,
+        help=f"comics packed into one LLM request, 1 to {MAX_BATCH_SIZE} (default: 4)",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=os.path.join(config.get("CACHE_DIR", "cache"), "backfill.json"),
+        help="progress file (default: <CACHE_DIR>/backfill.json)",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="forget past failures and retry the comics that were given up on",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=3,
+        help="runs a failing comic is tried in before it is skipped (default: 3)",
+    )
+    parser.add_argument(
+        "--limit", type=int, help="explain at most this many comics per source"
+    )
+    parser.add_argument(
+        "--progress-every",
+        type=int,
+        default=25,
+        help="log progress after this many comics (default: 25)",
+    )
+    parser.add_argument(
+        "--verbose", action="store_true", help="also log every scraper step"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    config = {**dotenv_values(".env.secret"), **dotenv_values(".env.public")}
+    args = parse_args(config, argv)
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s:%(levelname)s:%(name)s: %(message)s"
+    )
+
+    try:
+        results = asyncio.run(run(config, args))
+    except KeyboardInterrupt:
+        logger.info("Interrupted; the next run resumes where this one stopped")
+        return 130
+
+    failed = sum(counts["failed"] for counts in results.values())
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
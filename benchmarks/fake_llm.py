@@ -0,0 +1,165 @@
+import asyncio
+import base64
+import io
+import json
+import re
+from typing import Any, AsyncIterator
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from PIL import Image
+from scrapers.image_store import estimate_image_tokens
+
+DEFAULT_ANALYSIS = json.dumps(
+    {
+        "Core_concept": "SQL injection and input sanitization",
+        "Explanation": "The school's database trusted a student's name as code, so "
+        "the name ended the query and dropped the Students table. The joke is "
+        "that the mom named her son to teach the school to sanitize inputs.",
+    }
+)
+# an analysis with an explanation near the 950 character limit of the prompt
+FULL_LENGTH_ANALYSIS = json.dumps(
+    {
+        "Core_concept": "SQL injection and input sanitization",
+        "Explanation": "The school calls because its database lost this year's "
+        "student records, and the mom explains that her son is named Robert'); "
+        "DROP TABLE Students;--, nicknamed Little Bobby Tables. When the school "
+        "typed his name into its software, the quote and parenthesis closed the "
+        "SQL statement early, the semicolon started a new statement that deleted "
+        "the Students table, and the two dashes turned the rest of the original "
+        "query into a comment so nothing complained. The joke is that the mom "
+        "picked the name on purpose, years in advance, to teach the school a "
+        "lesson, and her closing line hopes they learned to sanitize their "
+        "database inputs: treat anything a user types as data, never as code, "
+        "by escaping it or better by using parameterized queries. Bobby Tables "
+        "became the standard example for explaining SQL injection to developers.",
+    }
+)
+
+
+class FakeVisionLLM(FakeListChatModel):
+    """
+    Stand-in for the Groq vision model with a configurable latency profile.
+
+    Replies with a canned analysis after `first_token_latency` seconds plus the
+    time to read the prompt at `prefill_tokens_per_second`, then streams it
+    word by word at `tokens_per_second`. Every `stall_every`-th call first
+    stalls for `stall_latency` seconds, like a stuck request. Like Groq, the
+    answer is cut off after `max_tokens` (about 4 characters each, also when
+    bound per call) with finish reason "length". Images sent inline are
+    measured; images sent by URL are assumed to be `remote_image_size`. A
+    request with several images (a batch) is answered with a JSON array
+    holding the analysis once per image. Counts its calls and input tokens so
+    the benchmark can report how many requests actually reached the "LLM" and
+    what they cost, and reports the usage like Groq does.
+    """
+
+    responses: list[str] = [DEFAULT_ANALYSIS]
+    model_name: str = "benchmark-fake-llm"
+    first_token_latency: float = 0.3
+    tokens_per_second: float = 150.0
+    prefill_tokens_per_second: float = 5000.0
+    remote_image_size: tuple[int, int] = (1, 1)
+    stall_every: int = 0
+    stall_latency: float = 0.0
+    max_tokens: int | None = None
+    calls: int = 0
+    input_tokens: int = 0
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        self.calls += 1
+        response = self.responses[self.i]
+        self.i = (self.i + 1) % len(self.responses)
+        images = self._count_images(messages)
+        if images > 1:
+            response = json.dumps([json.loads(response)] * images)
+        input_tokens = self._count_input_tokens(messages)
+        self.input_tokens += input_tokens
+
+        stalled = self.stall_every and self.calls % self.stall_every == 0
+        await asyncio.sleep(
+            self.first_token_latency
+            + input_tokens / self.prefill_tokens_per_second
+            + (self.stall_latency if stalled else 0.0)
+        )
+        max_tokens = kwargs.get("max_tokens", self.max_tokens)
+        output_tokens, finish_reason = 0, "stop"
+        for n, token in enumerate(re.findall(r"\S+\s*", response)):
+            cost = max(len(token) // 4, 1)
+            if max_tokens is not None and output_tokens + cost > max_tokens:
+                finish_reason = "length"
+                break
+            output_tokens += cost
+            if n:
+                await asyncio.sleep(1 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(
+                content="",
+                usage_metadata={
+                    "input_tokens": input_tokens,
+                    "output_tokens": output_tokens,
+                    "total_tokens": input_tokens + output_tokens,
+                },
+                response_metadata={
+                    "model_name": self.model_name,
+                    "finish_reason": finish_reason,
+                },
+            )
+        )
+
+    def _count_input_tokens(self, messages: list[BaseMessage]) -> int:
+        # roughly 4 characters per text token
+        tokens = 0
+        for message in messages:
+            parts = message.content
+            if isinstance(parts, str):
+                parts = [{"type": "text", "text": parts}]
+            for part in parts:
+                if part.get("type") == "image_url":
+                    tokens += estimate_image_tokens(*self._image_size(part))
+                else:
+                    tokens += len(part.get("text", "")) // 4
+        return tokens
+
+    @staticmethod
+    def _count_images(messages: list[BaseMessage]) -> int:
+        return sum(
+            1
+            for message in messages
+            if not isinstance(message.content, str)
+            for part in message.content
+            if part.get("type") == "image_url"
+        )
+
+    def _image_size(self, part: dict) -> tuple[int, int]:
+        url = part["image_url"]["url"]
+        if not url.startswith("data:"):
+            return self.remote_image_size
+        with Image.open(io.BytesIO(base64.b64decode(url.split(",", 1)[1]))) as image:
+            return image.size
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        # merged, so the usage and finish reason are kept
+        chunks = [chunk async for chunk in self._astream(messages, stop, **kwargs)]
+        message = sum((chunk.message for chunk in chunks[1:]), chunks[0].message)
+        return ChatResult(
+            generations=[
+                ChatGeneration(
+                    message=AIMessage(**message.model_dump(exclude={"type"}))
+                )
+            ]
+        )
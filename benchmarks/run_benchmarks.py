@@ -0,0 +1,634 @@
+"""
+Offline benchmarks for the comic scrapers.
+
+Runs every scraper against local stand-in upstreams (see upstreams.py) and a
+fake vision LLM (see fake_llm.py), so no network access or API keys are
+needed. Each operation is timed per scraper and reported as ops/s and latency
+percentiles, and the results are written as JSON.
+
+Usage (from the repository root):
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --iterations 50 --llm-latency 0.5
+    python -m benchmarks.run_benchmarks --baseline benchmarks/results/old.json
+"""
+
+import argparse
+import asyncio
+import datetime
+import inspect
+import itertools
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import aiohttp
+from bs4 import BeautifulSoup
+from benchmarks.fake_llm import FULL_LENGTH_ANALYSIS, FakeVisionLLM
+from benchmarks.upstreams import (
+    COMIC_IMAGE_SIZE,
+    BlockingSearchClient,
+    FixtureSearchBackend,
+    FixtureUpstreams,
+)
+from scrapers.explanation_cache import ExplanationCache
+from scrapers.html_extract import find_image
+from scrapers.monkey_user_scraper import MonkeyUserScraper
+from scrapers.scraper import MAX_TOKENS_PER_ANALYSIS
+from scrapers.search_backends import (
+    SEARCH_THREAD_POOL_SIZE,
+    DuckDuckGoSearchBackend,
+    GoogleSearchBackend,
+)
+from scrapers.turnoff_us_scraper import TurnOffUsScraper
+from scrapers.xkcd_scraper import XkcdScraper
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+SEARCH_ENGINE = "benchmark"
+SCRAPERS = {
+    "xkcd": XkcdScraper,
+    "monkeyuser": MonkeyUserScraper,
+    "turnoff_us": TurnOffUsScraper,
+}
+# the comic image container on each HTML-scraped site
+IMAGE_CONTAINERS = {
+    "monkeyuser": ("div", "content"),
+    "turnoff_us": ("article", "post-content"),
+}
+# scraper logging is kept to warnings so it does not skew the timings
+logger = logging.getLogger("benchmark")
+
+BENCHMARK_CONFIG = {
+    "XKCD_CSE_ID": "",
+    "MONKEYUSER_CSE_ID": "",
+    "TURNOFFUS_CSE_ID": "",
+    # hedge after the learned p95 alone
+    "LLM_HEDGE_MIN_DELAY_SECONDS": 0,
+}
+# one in this many fake LLM calls stalls in the hedging benchmark
+HEDGE_STALL_EVERY = 25
+# how often the loop lag probe wakes up, in seconds
+LAG_PROBE_INTERVAL = 0.01
+# total request timeout of the upstream timeout check, and how long the
+# stand-in upstreams stall meanwhile
+TIMEOUT_CHECK_TOTAL = 0.2
+TIMEOUT_CHECK_STALL = 1.0
+
+
+async def measure(operation, iterations: int, concurrency: int) -> dict:
+    """Run `operation(i)` `iterations` times on `concurrency` workers."""
+    latencies = []
+    errors = 0
+    counter = itertools.count()
+
+    async def worker():
+        nonlocal errors
+        while (i := next(counter)) < iterations:
+            started = time.perf_counter()
+            try:
+                result = await operation(i)
+            except Exception:
+                result = None
+            latencies.append(time.perf_counter() - started)
+            if result is None or _is_error_analysis(result):
+                errors += 1
+
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "errors": errors,
+        "ops_per_sec": iterations / elapsed if elapsed else 0.0,
+        "cpu_ms_per_op": cpu / iterations * 1000 if iterations else 0.0,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p95_ms": _percentile(latencies, 0.95) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+    }
+
+
+async def measure_loop_lag(operation, iterations: int, concurrency: int) -> dict:
+    """`measure`, plus the worst event loop lag seen while it ran."""
+    lags = [0.0]
+    ticked = time.perf_counter()
+
+    async def probe():
+        nonlocal ticked
+        while True:
+            await asyncio.sleep(LAG_PROBE_INTERVAL)
+            now = time.perf_counter()
+            lags.append(now - ticked - LAG_PROBE_INTERVAL)
+            ticked = now
+
+    task = asyncio.create_task(probe())
+    try:
+        result = await measure(operation, iterations, concurrency)
+    finally:
+        task.cancel()
+    # a stall can last until the very end, before the probe wakes up again
+    lags.append(time.perf_counter() - ticked - LAG_PROBE_INTERVAL)
+    result["max_loop_lag_ms"] = max(lags) * 1000
+    return result
+
+
+async def benchmark_search_backends(upstreams: FixtureUpstreams, args) -> dict:
+    """
+    Run the real Google and DuckDuckGo backends with blocking stand-in
+    clients and probe the event loop lag while their searches are in flight.
+    """
+    client = BlockingSearchClient(
+        upstreams.port, latency=args.search_latency, site="xkcd.com"
+    )
+    # skip the constructors, which build the real provider clients
+    google = GoogleSearchBackend.__new__(GoogleSearchBackend)
+    google._wrapper = client
+    duckduckgo = DuckDuckGoSearchBackend.__new__(DuckDuckGoSearchBackend)
+    duckduckgo._search = client
+
+    results = {}
+    for name, backend in (("google", google), ("duckduckgo", duckduckgo)):
+
+        async def search(i):
+            return await backend.search(f"benchmark {i}", "xkcd.com")
+
+        # more searches than pool threads, so some of them queue
+        results[f"{name}_search"] = await measure_loop_lag(
+            search, 2 * SEARCH_THREAD_POOL_SIZE, 2 * SEARCH_THREAD_POOL_SIZE
+        )
+    return results
+
+
+def check_loop_lag(report: dict, max_lag_ms: float) -> list[str]:
+    """Return the benchmarks during which the event loop stalled too long."""
+    return [
+        f"{scraper}.{operation}: event loop lag {result['max_loop_lag_ms']:.1f}ms"
+        for scraper, operations in report["results"].items()
+        for operation, result in operations.items()
+        if result.get("max_loop_lag_ms", 0.0) > max_lag_ms
+    ]
+
+
+async def check_upstream_timeouts(upstreams: FixtureUpstreams, cache_dir: str):
+    """
+    Drive a total request timeout through every scraper's fetch paths.
+
+    With nothing cached, a stalled upstream must make them give up and return
+    None instead of raising into the caller. Returns the paths that raised.
+    """
+    failures = []
+    session = upstreams.create_session(
+        timeout=aiohttp.ClientTimeout(total=TIMEOUT_CHECK_TOTAL)
+    )
+    upstreams.stall = TIMEOUT_CHECK_STALL
+    try:
+        for name, scraper_class in SCRAPERS.items():
+            config = {
+                **BENCHMARK_CONFIG,
+                "CACHE_DIR": os.path.join(cache_dir, f"{name}_timeout"),
+            }
+            scraper = scraper_class(config=config, logger=logger, session=session)
+
+            async def random_comic_url():
+                url = scraper.random_comic_url
+                return await url if inspect.isawaitable(url) else None
+
+            paths = {
+                "_fetch_content": lambda: scraper._fetch_content(
+                    scraper.latest_comic_url
+                ),
+                "random_comic_url": random_comic_url,
+                "_fetch_image": lambda: scraper._fetch_image(
+                    "https://imgs.xkcd.com/comics/timeout.png"
+                ),
+            }
+            for path, call in paths.items():
+                try:
+                    await call()
+                except Exception as e:
+                    failures.append(f"{name}.{path}: {type(e).__name__} {e}")
+            await scraper.close()
+    finally:
+        upstreams.stall = 0.0
+        await session.close()
+    return failures
+
+
+async def benchmark_scraper(
+    name: str, upstreams: FixtureUpstreams, session, args, cache_dir: str
+) -> dict:
+    config = {**BENCHMARK_CONFIG, "CACHE_DIR": os.path.join(cache_dir, name)}
+    explanation_cache = ExplanationCache(
+        path=os.path.join(cache_dir, name, "explanations.db")
+    )
+    scraper = SCRAPERS[name](
+        config=config,
+        logger=logger,
+        session=session,
+        explanation_cache=explanation_cache,
+    )
+    llm = FakeVisionLLM(
+        first_token_latency=args.llm_latency,
+        tokens_per_second=args.llm_tokens_per_second,
+        remote_image_size=COMIC_IMAGE_SIZE,
+        max_tokens=MAX_TOKENS_PER_ANALYSIS,
+    )
+    scraper.llm = llm
+    scraper._search_backends[SEARCH_ENGINE] = FixtureSearchBackend(session)
+
+    results = {}
+    iterations, concurrency = args.iterations, args.concurrency
+
+    async def fetch_content(i):
+        return await scraper._fetch_content(scraper.latest_comic_url)
+
+    results["fetch_content"] = await measure(fetch_content, iterations, concurrency)
+
+    if name in IMAGE_CONTAINERS:
+        results.update(
+            await benchmark_extraction(
+                session, scraper.latest_comic_url, *IMAGE_CONTAINERS[name], iterations
+            )
+        )
+
+    async def random_comic_upstream(i):
+        # the catalog is still empty, so this asks the upstream site
+        return await scraper.random_comic()
+
+    results["random_comic_upstream"] = await measure(
+        random_comic_upstream, iterations, concurrency
+    )
+
+    started = time.perf_counter()
+    await scraper.refresh_catalog()
+    results["refresh_catalog"] = {
+        "iterations": 1,
+        "entries": len(scraper.catalog),
+        "seconds": time.perf_counter() - started,
+    }
+
+    async def random_comic_catalog(i):
+        return await scraper.random_comic()
+
+    results["random_comic_catalog"] = await measure(
+        random_comic_catalog, iterations, concurrency
+    )
+
+    async def search_local_index(i):
+        return await scraper.search_comic(
+            upstreams.title(1 + i % upstreams.archive_size)
+        )
+
+    results["search_comic_local_index"] = await measure(
+        search_local_index, iterations, concurrency
+    )
+
+    async def search_web(i):
+        # words that are not in the local index go to the search engine
+        return await scraper.search_comic(f"zzbench{i}")
+
+    results["search_comic_web"] = await measure(search_web, iterations, concurrency)
+
+    comics = [await scraper.random_comic() for _ in range(min(iterations, 20))]
+    comics = [comic for comic in comics if comic is not None]
+
+    async def describe_uncached(i):
+        comic = comics[i % len(comics)]
+        # bypass the explanation cache to time the LLM path
+        return await scraper._generate_description(comic, ("benchmark", i))
+
+    async def measure_describe():
+        input_tokens = llm.input_tokens
+        result = await measure(describe_uncached, args.llm_iterations, concurrency)
+        result["input_tokens_per_op"] = (
+            llm.input_tokens - input_tokens
+        ) / args.llm_iterations
+        return result
+
+    results["describe_comic_uncached"] = await measure_describe()
+    # the same, sending the full-size image by URL instead of the prepared copy
+    image_store, scraper.image_store = scraper.image_store, None
+    results["describe_comic_uncached_image_url"] = await measure_describe()
+    scraper.image_store = image_store
+
+    async def describe_batch_uncached(i):
+        start = i * args.batch_size
+        batch = [comics[(start + n) % len(comics)] for n in range(args.batch_size)]
+        analyses = await scraper._generate_batch_description(batch)
+        return None if None in analyses else analyses
+
+    # one op is a whole batch; tokens are reported per comic to compare with
+    # describe_comic_uncached. The answers are full length, so a batch that
+    # does not fit the output token limit shows up as errors.
+    batches = max(args.llm_iterations // args.batch_size, 1)
+    input_tokens = llm.input_tokens
+    responses, llm.responses = llm.responses, [FULL_LENGTH_ANALYSIS]
+    results["describe_comics_batch_uncached"] = await measure(
+        describe_batch_uncached, batches, concurrency
+    )
+    llm.responses = responses
+    results["describe_comics_batch_uncached"]["input_tokens_per_op"] = (
+        llm.input_tokens - input_tokens
+    ) / (batches * args.batch_size)
+
+    results.update(await benchmark_hedging(scraper, comics, args))
+
+    async def describe_cached(i):
+        return await scraper.describe_comic(comics[i % len(comics)])
+
+    for comic in comics:
+        await scraper.describe_comic(comic)
+    results["describe_comic_cached"] = await measure(
+        describe_cached, iterations, concurrency
+    )
+
+    await scraper.close()
+    explanation_cache.close()
+    return results
+
+
+async def benchmark_hedging(scraper, comics: list, args) -> dict:
+    """
+    Compare uncached explanation latency with and without hedging, against a
+    model where one call in HEDGE_STALL_EVERY stalls; the alternate never does.
+    """
+    llm = scraper.llm
+    scraper.llm = FakeVisionLLM(
+        first_token_latency=args.llm_latency,
+        tokens_per_second=args.llm_tokens_per_second,
+        remote_image_size=COMIC_IMAGE_SIZE,
+        max_tokens=MAX_TOKENS_PER_ANALYSIS,
+        stall_every=HEDGE_STALL_EVERY,
+        stall_latency=args.llm_stall,
+    )
+    scraper.alternate_llm = FakeVisionLLM(
+        model_name="benchmark-fake-llm-alternate",
+        first_token_latency=args.llm_latency,
+        tokens_per_second=args.llm_tokens_per_second,
+        remote_image_size=COMIC_IMAGE_SIZE,
+        max_tokens=MAX_TOKENS_PER_ANALYSIS,
+    )
+    results = {}
+    for hedge in (False, True):
+
+        async def describe(i):
+            comic = comics[i % len(comics)]
+            return await scraper._generate_description(
+                comic, ("benchmark", i), hedge=hedge
+            )
+
+        # the unhedged run also teaches the scraper the model's p95
+        name = "describe_comic_hedged" if hedge else "describe_comic_unhedged"
+        results[name] = await measure(
+            describe, args.hedge_iterations, args.hedge_concurrency
+        )
+    scraper.llm, scraper.alternate_llm = llm, None
+    return results
+
+
+async def benchmark_extraction(
+    session, url: str, container_tag: str, container_class: str, iterations: int
+) -> dict:
+    """Compare a full BeautifulSoup parse with the targeted pull-parser lookup."""
+    async with session.get(url) as response:
+        response.raise_for_status()
+        html = await response.read()
+
+    async def full_tree(i):
+        soup = BeautifulSoup(html, "lxml")
+        container = soup.find(container_tag, class_=container_class)
+        return container.find("img") if container else None
+
+    async def targeted(i):
+        return find_image(html, container_tag, container_class)[1]
+
+    return {
+        "extract_page_bs4": await measure(full_tree, iterations, 1),
+        "extract_page_lxml": await measure(targeted, iterations, 1),
+    }
+
+
+async def run(args) -> dict:
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+    os.environ.setdefault("IMAGE_LLM", "benchmark-fake-llm")
+    os.environ["SEARCH_ENGINE"] = SEARCH_ENGINE
+
+    results = {}
+    async with FixtureUpstreams() as upstreams:
+        session = upstreams.create_session()
+        try:
+            with tempfile.TemporaryDirectory() as cache_dir:
+                for name in args.scrapers:
+                    print(f"Benchmarking {name}...", file=sys.stderr)
+                    results[name] = await benchmark_scraper(
+                        name, upstreams, session, args, cache_dir
+                    )
+                print("Benchmarking search backends...", file=sys.stderr)
+                results["search_backends"] = await benchmark_search_backends(
+                    upstreams, args
+                )
+                print("Checking upstream timeouts...", file=sys.stderr)
+                timeout_failures = await check_upstream_timeouts(upstreams, cache_dir)
+        finally:
+            await session.close()
+
+    return {
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "iterations": args.iterations,
+            "llm_iterations": args.llm_iterations,
+            "concurrency": args.concurrency,
+            "batch_size": args.batch_size,
+            "hedge_iterations": args.hedge_iterations,
+            "llm_stall": args.llm_stall,
+            "search_latency": args.search_latency,
+            "llm_latency": args.llm_latency,
+            "llm_tokens_per_second": args.llm_tokens_per_second,
+        },
+        "results": results,
+        "timeout_failures": timeout_failures,
+    }
+
+
+def compare(report: dict, baseline: dict, max_regression: float) -> list[str]:
+    """Return the benchmarks whose p50 got slower than allowed vs `baseline`."""
+    regressions = []
+    for scraper, operations in report["results"].items():
+        for operation, result in operations.items():
+            previous = baseline.get("results", {}).get(scraper, {}).get(operation)
+            if not previous or "p50_ms" not in result or not previous.get("p50_ms"):
+                continue
+            change = result["p50_ms"] / previous["p50_ms"] - 1
+            if change > max_regression:
+                regressions.append(
+                    f"{scraper}.{operation}: p50 {previous['p50_ms']:.2f}ms -> "
+                    f"{result['p50_ms']:.2f}ms ({change:+.0%})"
+                )
+    return regressions
+
+
+def print_report(report: dict):
+    print(
+        f"{'benchmark':<46}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'p99 ms':>10}{'cpu ms':>10}{'errors':>8}{'tokens':>8}"
+    )
+    for scraper, operations in report["results"].items():
+        for operation, result in operations.items():
+            label = f"{scraper}.{operation}"
+            if "p50_ms" not in result:
+                print(f"{label:<46}{'':>10}{result['seconds'] * 1000:>10.1f}")
+                continue
+            tokens = (
+                f"{result['input_tokens_per_op']:.0f}"
+                if "input_tokens_per_op" in result
+                else ""
+            )
+            print(
+                f"{label:<46}{result['ops_per_sec']:>10.1f}{result['p50_ms']:>10.2f}"
+                f"{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+                f"{result.get('cpu_ms_per_op', 0.0):>10.2f}{result['errors']:>8}"
+                f"{tokens:>8}"
+            )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--scrapers",
+        nargs="+",
+        choices=sorted(SCRAPERS),
+        default=list(SCRAPERS),
+        help="scrapers to benchmark (default: all)",
+    )
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument(
+        "--llm-iterations",
+        type=int,
+        default=5,
+        help="iterations of the uncached describe benchmark, which waits on the fake LLM",
+    )
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=4,
+        help="comics per request in the batched describe benchmark (default: 4)",
+    )
+    parser.add_argument(
+        "--llm-latency",
+        type=float,
+        default=0.3,
+        help="fake LLM time to first token before reading the prompt, in seconds",
+    )
+    parser.add_argument("--llm-tokens-per-second", type=float, default=150.0)
+    parser.add_argument(
+        "--hedge-iterations",
+        type=int,
+        default=50,
+        help="iterations of each hedging benchmark, for a p99 (default: 50)",
+    )
+    parser.add_argument("--hedge-concurrency", type=int, default=10)
+    parser.add_argument(
+        "--llm-stall",
+        type=float,
+        default=5.0,
+        help="extra seconds a stalled fake LLM call takes to answer (default: 5)",
+    )
+    parser.add_argument(
+        "--search-latency",
+        type=float,
+        default=0.3,
+        help="seconds each blocking stand-in search client call blocks (default: 0.3)",
+    )
+    parser.add_argument(
+        "--max-loop-lag-ms",
+        type=float,
+        default=100.0,
+        help="event loop lag during the search backend benchmark that fails the run "
+        "(default: 100)",
+    )
+    parser.add_argument(
+        "--output",
+        help="where to write the JSON results (default: benchmarks/results/<time>.json)",
+    )
+    parser.add_argument("--baseline", help="earlier JSON results to compare against")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.25,
+        help="allowed p50 slowdown vs the baseline before failing (default: 0.25)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    for failure in report["timeout_failures"]:
+        print(f"TIMEOUT NOT HANDLED {failure}")
+    if report["timeout_failures"]:
+        return 1
+
+    stalls = check_loop_lag(report, args.max_loop_lag_ms)
+    for stall in stalls:
+        print(f"LOOP STALL {stall}")
+    if stalls:
+        return 1
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+def _is_error_analysis(result) -> bool:
+    return isinstance(result, dict) and result.get("Core_concept") == "Error"
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    return samples[min(int(len(samples) * q), len(samples) - 1)]
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,396 @@
+import asyncio
+import datetime
+import hashlib
+import io
+import ipaddress
+import json
+import os
+import random
+import socket
+import ssl
+import tempfile
+import time
+import urllib.request
+from string import Template
+from urllib.parse import quote
+import aiohttp
+from aiohttp import web
+from aiohttp.abc import AbstractResolver
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+from PIL import Image, ImageDraw
+from scrapers.http_session import (
+    DNS_CACHE_TTL,
+    KEEPALIVE_TIMEOUT,
+    PER_HOST_CONNECTION_LIMIT,
+    REQUEST_TIMEOUT,
+    TOTAL_CONNECTION_LIMIT,
+)
+from scrapers.search_backends import SearchBackend
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+# comics per site in the stand-in archives
+ARCHIVE_SIZE = 100
+# related-comic links padding each page, to get realistic page sizes
+ARCHIVE_LINKS_PER_PAGE = 150
+# size of the served comic image, like a full-resolution xkcd "_2x" strip
+COMIC_IMAGE_SIZE = (1480, 1100)
+SEARCH_HOST = "search.benchmark"
+UPSTREAM_HOSTS = (
+    "xkcd.com",
+    "www.xkcd.com",
+    "c.xkcd.com",
+    "imgs.xkcd.com",
+    "www.monkeyuser.com",
+    "turnoff.us",
+    SEARCH_HOST,
+)
+TITLES = (
+    "Code Review",
+    "Hotfix",
+    "Legacy Code",
+    "Merge Conflict",
+    "Technical Debt",
+    "Works On My Machine",
+    "Production Bug",
+    "Estimates",
+)
+
+
+class FixtureUpstreams:
+    """
+    Local HTTPS server standing in for xkcd, monkeyuser, turnoff.us and search.
+
+    Pages are rendered from the templates in `fixtures/` and routed by the Host
+    header, so the scrapers run unmodified against their real URLs. Sessions
+    from `create_session` resolve every upstream host to this server and skip
+    certificate verification for its throwaway self-signed certificate.
+
+    Usage:
+        async with FixtureUpstreams() as upstreams:
+            session = upstreams.create_session()
+    """
+
+    def __init__(self, archive_size: int = ARCHIVE_SIZE):
+        self.archive_size = archive_size
+        self.port = None
+        self.requests = 0
+        # seconds every response is held back, to drive client timeouts
+        self.stall = 0.0
+        self._runner = None
+
+        with open(os.path.join(FIXTURES_DIR, "xkcd_comics.json")) as f:
+            self._xkcd_comics = json.load(f)
+        with open(os.path.join(FIXTURES_DIR, "monkeyuser_comic.html")) as f:
+            self._monkeyuser_page = Template(f.read())
+        with open(os.path.join(FIXTURES_DIR, "turnoff_comic.html")) as f:
+            self._turnoff_page = Template(f.read())
+        self._images: dict[str, bytes] = {}
+
+        self._monkeyuser_index = [
+            {"url": f"/2024/{_slug(self.title(n))}/", "title": self.title(n)}
+            for n in range(archive_size, 0, -1)
+        ]
+        self._turnoff_pages = [
+            f"/geek/{_slug(self.title(n))}/" for n in range(archive_size, 0, -1)
+        ]
+        self._archive_links = "\n".join(
+            f'<li><a href="/2024/{_slug(self.title(n))}/">{self.title(n)}</a></li>'
+            for n in range(1, ARCHIVE_LINKS_PER_PAGE + 1)
+        )
+
+    @staticmethod
+    def title(n: int) -> str:
+        return f"{TITLES[n % len(TITLES)]} {n}"
+
+    def xkcd_comic(self, num: int) -> dict:
+        comic = dict(self._xkcd_comics[num % len(self._xkcd_comics)])
+        comic["num"] = num
+        # distinct images, so explanations are not shared between comics
+        comic["img"] = comic["img"].replace(".png", f"_{num}.png")
+        return comic
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_route("GET", "/{path:.*}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(
+            self._runner, "127.0.0.1", 0, ssl_context=_self_signed_context()
+        )
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def create_session(
+        self, timeout: aiohttp.ClientTimeout = REQUEST_TIMEOUT
+    ) -> aiohttp.ClientSession:
+        """A session pooled like `create_http_session`, pointed at this server."""
+        connector = aiohttp.TCPConnector(
+            limit=TOTAL_CONNECTION_LIMIT,
+            limit_per_host=PER_HOST_CONNECTION_LIMIT,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            resolver=_FixtureResolver(self.port),
+            ssl=False,
+        )
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        if self.stall:
+            await asyncio.sleep(self.stall)
+        response = self._route(request)
+        # validators like the real sites send, so conditional GETs get a 304
+        etag = f'"{hashlib.md5(response.body).hexdigest()}"'
+        if request.headers.get("If-None-Match") == etag:
+            raise web.HTTPNotModified(headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        return response
+
+    def _route(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        host = request.host.split(":")[0]
+        path = request.path
+        if host in ("xkcd.com", "www.xkcd.com"):
+            return self._xkcd(path)
+        if host == "c.xkcd.com":
+            num = 1 + self.requests % self.archive_size
+            raise web.HTTPFound(f"https://xkcd.com/{num}/")
+        if host == "imgs.xkcd.com" or path.startswith("/images/"):
+            if path not in self._images:
+                self._images[path] = _comic_image(COMIC_IMAGE_SIZE, seed=path)
+            return web.Response(body=self._images[path], content_type="image/png")
+        if host == "www.monkeyuser.com":
+            return self._monkeyuser(path)
+        if host == "turnoff.us":
+            return self._turnoff(path)
+        if host == SEARCH_HOST:
+            return self._search(request.query.get("q", ""))
+        raise web.HTTPNotFound()
+
+    def _xkcd(self, path: str) -> web.Response:
+        parts = [part for part in path.split("/") if part]
+        if parts == ["info.0.json"]:
+            return web.json_response(self.xkcd_comic(self.archive_size))
+        if parts and parts[0].isdigit() and 0 < int(parts[0]) <= self.archive_size:
+            if parts[1:] == ["info.0.json"]:
+                return web.json_response(self.xkcd_comic(int(parts[0])))
+            return web.Response(text="<html>xkcd</html>", content_type="text/html")
+        if not parts:
+            return web.Response(text="<html>xkcd</html>", content_type="text/html")
+        raise web.HTTPNotFound()
+
+    def _monkeyuser(self, path: str) -> web.Response:
+        if path == "/index.json":
+            return web.json_response(self._monkeyuser_index)
+        if path == "/":
+            path = self._monkeyuser_index[0]["url"]
+        for comic in self._monkeyuser_index:
+            if comic["url"] == path:
+                html = self._monkeyuser_page.substitute(
+                    title=comic["title"],
+                    alt=comic["title"],
+                    image=f"/images/{_slug(comic['title'])}.png",
+                    archive=self._archive_links,
+                )
+                return web.Response(text=html, content_type="text/html")
+        raise web.HTTPNotFound()
+
+    def _turnoff(self, path: str) -> web.Response:
+        if path == "/":
+            path = self._turnoff_pages[0]
+        if path not in self._turnoff_pages:
+            raise web.HTTPNotFound()
+        title = path.strip("/").split("/")[-1].replace("-", " ")
+        html = self._turnoff_page.substitute(
+            title=title,
+            alt=title,
+            image=f"/images/{_slug(title)}.png",
+            archive=self._archive_links,
+            pages=json.dumps(self._turnoff_pages),
+        )
+        return web.Response(text=html, content_type="text/html")
+
+    def _search(self, query: str) -> web.Response:
+        # deterministic "top result": any comic of the requested site
+        site = next(
+            (word[5:] for word in query.split() if word.startswith("site:")), ""
+        )
+        n = 1 + sum(map(ord, query)) % self.archive_size
+        if "xkcd" in site:
+            link = f"https://xkcd.com/{n}/"
+        elif "monkeyuser" in site:
+            link = f"https://www.monkeyuser.com{self._monkeyuser_index[n - 1]['url']}"
+        elif "turnoff" in site:
+            link = f"https://turnoff.us{self._turnoff_pages[n - 1]}"
+        else:
+            return web.json_response([])
+        return web.json_response([{"link": link}])
+
+
+class FixtureSearchBackend(SearchBackend):
+    """Search backend asking the stand-in search host instead of a real engine."""
+
+    def __init__(self, session: aiohttp.ClientSession):
+        self._session = session
+
+    async def search(self, query: str, site: str) -> str | None:
+        url = f"https://{SEARCH_HOST}/search?q={quote(f'{query} site:{site}')}"
+        async with self._session.get(url) as response:
+            response.raise_for_status()
+            results = await response.json()
+        if results:
+            return results[0]["link"]
+        return None
+
+
+class BlockingSearchClient:
+    """
+    Blocking stand-in for the provider clients behind the real search backends.
+
+    Sleeps `latency` seconds, then asks the stand-in search host with a
+    synchronous HTTPS request, like the Google and DuckDuckGo clients block
+    their caller. It offers `results`, used on `GoogleSearchAPIWrapper`, and
+    `invoke`, used on `DuckDuckGoSearchResults`. If it were run on the event
+    loop serving the stand-in host, the request could not be answered and
+    would time out.
+    """
+
+    def __init__(self, port: int, latency: float, site: str, timeout: float = 2):
+        self.port = port
+        self.latency = latency
+        # Google's custom search engine adds the site restriction itself
+        self.site = site
+        self.timeout = timeout
+
+    def results(self, query: str, num_results: int) -> list[dict]:
+        return self._get(f"{query} site:{self.site}")[:num_results]
+
+    def invoke(self, query: str) -> str:
+        return json.dumps(self._get(query))
+
+    def _get(self, query: str) -> list[dict]:
+        time.sleep(self.latency)
+        request = urllib.request.Request(
+            f"https://127.0.0.1:{self.port}/search?q={quote(query)}",
+            headers={"Host": SEARCH_HOST},
+        )
+        with urllib.request.urlopen(
+            request, context=ssl._create_unverified_context(), timeout=self.timeout
+        ) as response:
+            return json.load(response)
+
+
+class _FixtureResolver(AbstractResolver):
+    def __init__(self, port: int):
+        self._port = port
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        if host not in UPSTREAM_HOSTS:
+            raise OSError(f"{host} is not a benchmark upstream")
+        return [
+            {
+                "hostname": host,
+                "host": "127.0.0.1",
+                "port": self._port,
+                "family": socket.AF_INET,
+                "proto": 0,
+                "flags": socket.AI_NUMERICHOST,
+            }
+        ]
+
+    async def close(self):
+        pass
+
+
+def _slug(title: str) -> str:
+    return title.lower().replace(" ", "-")
+
+
+def _comic_image(size: tuple[int, int], seed: str) -> bytes:
+    # black line art on white with lettering, which compresses like a real strip;
+    # the layout depends on `seed`, so every comic is a different picture
+    rng = random.Random(seed)
+    width, height = size
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    panel_width = width // 3
+    for panel in range(3):
+        left = panel * panel_width + 10
+        draw.rectangle(
+            (left, 10, left + panel_width - 20, height - 10), outline="black", width=4
+        )
+        for _ in range(rng.randint(1, 4)):
+            x, y = rng.randrange(left, left + panel_width - 100), rng.randrange(height)
+            draw.rectangle((x, y, x + 80, y + rng.randint(40, 300)), fill="black")
+        head = (
+            left + rng.randint(60, panel_width - 80),
+            rng.randint(height // 4, height // 2),
+        )
+        draw.ellipse(
+            (head[0] - 40, head[1] - 40, head[0] + 40, head[1] + 40),
+            outline="black",
+            width=4,
+        )
+        draw.line((head[0], head[1] + 40, head[0], height - 200), fill="black", width=4)
+        for line in range(6):
+            draw.text(
+                (left + 30, 40 + line * 30),
+                f"Panel {panel + 1} line {line}",
+                fill="black",
+            )
+    output = io.BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+
+def _self_signed_context() -> ssl.SSLContext:
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "benchmark")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(
+            x509.SubjectAlternativeName(
+                [x509.DNSName(host) for host in UPSTREAM_HOSTS]
+                + [x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]
+            ),
+            critical=False,
+        )
+        .sign(key, hashes.SHA256())
+    )
+
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    with tempfile.TemporaryDirectory() as directory:
+        cert_path = os.path.join(directory, "cert.pem")
+        key_path = os.path.join(directory, "key.pem")
+        with open(cert_path, "wb") as f:
+            f.write(certificate.public_bytes(serialization.Encoding.PEM))
+        with open(key_path, "wb") as f:
+            f.write(
+                key.private_bytes(
+                    serialization.Encoding.PEM,
+                    serialization.PrivateFormat.PKCS8,
+                    serialization.NoEncryption(),
+                )
+            )
+        context.load_cert_chain(cert_path, key_path)
+    return context
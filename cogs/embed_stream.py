@@ -0,0 +1,69 @@
+import asyncio
+import time
+import discord
+
+# Discord allows about five edits per message every five seconds
+STREAM_EDIT_INTERVAL = 1.5  # seconds
+
+# shown in place of the explanation fields until the analysis is ready
+EXPLANATION_PENDING = "⏳ Explaining this comic..."
+EXPLANATION_UNAVAILABLE = (
+    "No explanation is available right now, please try again later."
+)
+
+
+class EmbedStream:
+    """
+    Shows an embed that is still being written, without hitting rate limits.
+
+    The first `update` sends the message through `send`, which must return the
+    sent message (e.g. `interaction.followup.send(..., wait=True)`). Later
+    updates edit it at most once per `interval`, skipping intermediate states.
+    Updates never wait on Discord, so a slow edit does not hold up the LLM
+    stream. `finish` always shows the final embed right away.
+    """
+
+    def __init__(self, send, interval: float = STREAM_EDIT_INTERVAL):
+        self._send = send
+        self._interval = interval
+        self.message = None
+        self._pending: discord.Embed | None = None
+        self._last_edit = 0.0
+        self._flush_task: asyncio.Task | None = None
+        self._finished = asyncio.Event()
+
+    async def update(self, embed: discord.Embed):
+        self._pending = embed
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_quietly())
+
+    async def finish(self, embed: discord.Embed):
+        self._pending = embed
+        self._finished.set()
+        if self._flush_task is not None and not self._flush_task.done():
+            await self._flush_task
+        await self._flush()
+        return self.message
+
+    async def _flush_quietly(self):
+        try:
+            await self._flush()
+        except discord.HTTPException:
+            # intermediate states are best effort; finish shows the final one
+            pass
+
+    async def _flush(self):
+        while self._pending is not None:
+            if self.message is None:
+                embed, self._pending = self._pending, None
+                self.message = await self._send(embed)
+            else:
+                delay = self._last_edit + self._interval - time.monotonic()
+                if delay > 0 and not self._finished.is_set():
+                    try:
+                        await asyncio.wait_for(self._finished.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                embed, self._pending = self._pending, None
+                await self.message.edit(embed=embed)
+            self._last_edit = time.monotonic()
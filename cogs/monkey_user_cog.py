@@ -1,12 +1,27 @@
+import asyncio
 import discord
 import datetime
 from discord import app_commands
 from discord.ext import commands, tasks
+from cogs.embed_stream import (
+    EXPLANATION_PENDING,
+    EXPLANATION_UNAVAILABLE,
+    EmbedStream,
+)
 from objects.comic_object import ComicData
 from scrapers.monkey_user_scraper import MonkeyUserScraper
+from scrapers.llm_scheduler import Priority
 
 timezone = datetime.timezone(datetime.timedelta(hours=8))
 task_time = datetime.time(hour=8, minute=0, second=0, tzinfo=timezone)
+# scheduled posts are picked and explained ahead of task_time; later runs are
+# retries and do nothing once a post is ready
+prepare_times = [
+    datetime.time(hour=hour, minute=0, second=0, tzinfo=timezone) for hour in (4, 6, 7)
+]
+catalog_refresh_minutes = 30
+# new releases are polled with a conditional GET, so this can be frequent
+release_check_minutes = 5
 
 
 class MonkeyUserCog(commands.Cog):
@@ -29,12 +44,38 @@ class MonkeyUserCog(commands.Cog):
         self.bot = bot
         self.config = config
         self.logger = logger
-        self.monkey_user_scraper = MonkeyUserScraper(config=config, logger=logger)
+        self.next_post_embed = None
+        self.next_post_comic = None
+        self.monkey_user_scraper = MonkeyUserScraper(
+            config=config,
+            logger=logger,
+            session=bot.http_session,
+            explanation_cache=bot.explanation_cache,
+            llm_scheduler=bot.llm_scheduler,
+            metrics=bot.metrics,
+        )
 
     @commands.Cog.listener()
     async def on_ready(self):
         if not self.post_monkey_user_comic.is_running():
             self.post_monkey_user_comic.start()
+        if not self.prepare_monkey_user_comic.is_running():
+            self.prepare_monkey_user_comic.start()
+            # also prepare right away in case the bot starts after prepare_times
+            self.startup_prepare_task = asyncio.create_task(
+                self.prepare_monkey_user_comic()
+            )
+        if not self.refresh_monkey_user_catalog.is_running():
+            self.refresh_monkey_user_catalog.start()
+        if not self.watch_monkey_user_releases.is_running():
+            self.watch_monkey_user_releases.start()
+
+    async def cog_unload(self):
+        self.post_monkey_user_comic.cancel()
+        self.prepare_monkey_user_comic.cancel()
+        self.refresh_monkey_user_catalog.cancel()
+        self.watch_monkey_user_releases.cancel()
+        await self.monkey_user_scraper.close()
 
     @app_commands.command(
         name="monkey_user", description="Get the usable options for monkeyuser.com"
@@ -73,9 +114,28 @@ class MonkeyUserCog(commands.Cog):
     async def post_monkey_user_comic(self):
         channel = self.bot.get_channel(int(self.config["MONKEYUSER_CHANNEL_ID"]))
         if channel:
-            result = await self.monkey_user_scraper.random_comic()
-            embed = await _create_comic_embed(self.monkey_user_scraper, result)
-            await channel.send(embed=embed)
+            embed, comic = self.next_post_embed, self.next_post_comic
+            self.next_post_embed = self.next_post_comic = None
+            if embed is None:
+                self.logger.warning("monkeyuser: No prepared comic, fetching one now.")
+                result = await self.monkey_user_scraper.random_comic(skip_posted=True)
+                if result is None:
+                    self.logger.error("monkeyuser: Failed to fetch a comic to post.")
+                    return
+                # post the comic right away and fill in the explanation when ready
+                await _stream_comic_embed(
+                    lambda embed: channel.send(embed=embed),
+                    self.monkey_user_scraper,
+                    result,
+                    Priority.SCHEDULED,
+                )
+                await self.monkey_user_scraper.record_post(result)
+            else:
+                embed.set_footer(
+                    text=f"Posted at {datetime.datetime.now(tz=timezone).strftime('%Y/%m/%d %H:%M:%S')}"
+                )
+                await channel.send(embed=embed)
+                await self.monkey_user_scraper.record_post(comic)
         else:
             self.logger.error("monkeyuser channel not found.")
 
@@ -83,6 +143,72 @@ class MonkeyUserCog(commands.Cog):
     async def before_post_monkey_user_comic_task(self):
         await self.bot.wait_until_ready()
 
+    @tasks.loop(time=prepare_times)
+    async def prepare_monkey_user_comic(self):
+        if self.next_post_embed is not None:
+            return
+        result = await self.monkey_user_scraper.prepare_comic()
+        if result is None:
+            self.logger.error("monkeyuser: Failed to prepare the scheduled comic.")
+            return
+        self.next_post_comic = result
+        self.next_post_embed = await _create_comic_embed(
+            self.monkey_user_scraper, result
+        )
+
+    @prepare_monkey_user_comic.before_loop
+    async def before_prepare_monkey_user_comic_task(self):
+        await self.bot.wait_until_ready()
+
+    @tasks.loop(minutes=catalog_refresh_minutes)
+    async def refresh_monkey_user_catalog(self):
+        await self.monkey_user_scraper.refresh_catalog()
+
+    @tasks.loop(minutes=release_check_minutes)
+    async def watch_monkey_user_releases(self):
+        comics = await self.monkey_user_scraper.check_new_releases()
+        if not comics:
+            return
+        channel = self.bot.get_channel(int(self.config["MONKEYUSER_CHANNEL_ID"]))
+        if not channel:
+            self.logger.error("monkeyuser channel not found.")
+            return
+        for comic in comics:
+            # explain before posting, so the release goes out complete
+            img_description_json = await self.monkey_user_scraper.describe_comic(
+                comic, Priority.SCHEDULED
+            )
+            if img_description_json.get("Core_concept") == "Error":
+                if not self.monkey_user_scraper.release_explanation_failed(comic):
+                    # the next check retries it, and the releases after it wait
+                    self.logger.warning(
+                        "monkeyuser: Explaining new release %s failed, retrying later",
+                        comic.source_url,
+                    )
+                    break
+            # a re-upload of a posted comic is only recognised by its image,
+            # which describing it has just fingerprinted
+            if await self.monkey_user_scraper.was_posted(comic):
+                await self.monkey_user_scraper.mark_released(comic)
+                continue
+            try:
+                with self.monkey_user_scraper.metrics.time(
+                    "discord_send", self.monkey_user_scraper.comic_name
+                ):
+                    await channel.send(
+                        embed=_build_comic_embed(comic, img_description_json)
+                    )
+                await self.monkey_user_scraper.record_post(comic)
+            except discord.HTTPException as e:
+                # not marked as released, so the next check posts it again
+                self.logger.error("monkeyuser: Failed to post new release: %s", e)
+                break
+            await self.monkey_user_scraper.mark_released(comic)
+
+    @watch_monkey_user_releases.before_loop
+    async def before_watch_monkey_user_releases_task(self):
+        await self.bot.wait_until_ready()
+
 
 class MonkeyUserSearchModal(discord.ui.Modal, title="Search"):
     """
@@ -115,12 +241,7 @@ class MonkeyUserSearchModal(discord.ui.Modal, title="Search"):
             await interaction.followup.send("No results found.", ephemeral=True)
             return
 
-        embed = await _create_comic_embed(self.monkey_user_scraper, result)
-        await interaction.followup.send(
-            embed=embed,
-            view=MonkeyUserButtonView(self.monkey_user_scraper),
-            ephemeral=True,
-        )
+        await _send_comic_followup(interaction, self.monkey_user_scraper, result)
 
 
 class MonkeyUserButtonView(discord.ui.View):
@@ -151,12 +272,7 @@ class MonkeyUserButtonView(discord.ui.View):
             await interaction.followup.send("Try again.", ephemeral=True)
             return
 
-        embed = await _create_comic_embed(self.monkey_user_scraper, result)
-        await interaction.followup.send(
-            embed=embed,
-            view=MonkeyUserButtonView(self.monkey_user_scraper),
-            ephemeral=True,
-        )
+        await _send_comic_followup(interaction, self.monkey_user_scraper, result)
 
     @discord.ui.button(label="Random Select", style=discord.ButtonStyle.red, emoji="👀")
     async def random_button_callback(
@@ -168,12 +284,7 @@ class MonkeyUserButtonView(discord.ui.View):
             await interaction.followup.send("Try again.", ephemeral=True)
             return
 
-        embed = await _create_comic_embed(self.monkey_user_scraper, result)
-        await interaction.followup.send(
-            embed=embed,
-            view=MonkeyUserButtonView(self.monkey_user_scraper),
-            ephemeral=True,
-        )
+        await _send_comic_followup(interaction, self.monkey_user_scraper, result)
 
     @discord.ui.button(
         label="Search Comic in monkeyuser.com",
@@ -196,16 +307,87 @@ class MonkeyUserButtonView(discord.ui.View):
 async def _create_comic_embed(
     monkey_user_scraper: MonkeyUserScraper, comic_data: ComicData
 ):
-    img_url = comic_data.image_url
-    img_description_json = await monkey_user_scraper.describe_comic()
+    img_description_json = await monkey_user_scraper.describe_comic(comic_data)
+    return _build_comic_embed(comic_data, img_description_json)
 
-    embed = discord.Embed(title=comic_data.title, url=comic_data.source_url)
 
-    for key, value in img_description_json.items():
-        embed.add_field(name=key, value=value, inline=False)
+async def _send_comic_followup(
+    interaction: discord.Interaction,
+    monkey_user_scraper: MonkeyUserScraper,
+    comic_data: ComicData,
+):
+    """Send the comic as a followup right away and stream its explanation into it."""
+    await _stream_comic_embed(
+        lambda embed: interaction.followup.send(
+            embed=embed,
+            view=MonkeyUserButtonView(monkey_user_scraper),
+            ephemeral=True,
+            wait=True,
+        ),
+        monkey_user_scraper,
+        comic_data,
+    )
+
+
+async def _stream_comic_embed(
+    send,
+    monkey_user_scraper: MonkeyUserScraper,
+    comic_data: ComicData,
+    priority: Priority = Priority.INTERACTIVE,
+):
+    """Post the comic through `send` at once, then edit its explanation in."""
+
+    async def timed_send(embed: discord.Embed):
+        with monkey_user_scraper.metrics.time(
+            "discord_send", monkey_user_scraper.comic_name
+        ):
+            return await send(embed)
 
-    embed.set_image(url=img_url)
+    stream = EmbedStream(timed_send)
+    await stream.update(_build_comic_embed(comic_data, None))
+
+    async def on_partial(partial: dict):
+        await stream.update(_build_comic_embed(comic_data, partial))
+
+    try:
+        img_description_json = await monkey_user_scraper.describe_comic(
+            comic_data, priority, on_partial=on_partial
+        )
+    except Exception:
+        # never leave the message stuck on the pending placeholder
+        await stream.finish(_build_comic_embed(comic_data, {"Core_concept": "Error"}))
+        raise
+    await stream.finish(_build_comic_embed(comic_data, img_description_json))
+
+
+def _build_comic_embed(comic_data: ComicData, img_description_json: dict | None):
+    """
+    Build the comic embed; `img_description_json` is None while the explanation
+    is pending, partial while it streams in, and an error analysis on failure.
+    """
+    embed = discord.Embed(title=comic_data.title, url=comic_data.source_url)
+
+    fields = {
+        key: value for key, value in (img_description_json or {}).items() if value
+    }
+    if fields.get("Core_concept") == "Error":
+        embed.add_field(name="Explanation", value=EXPLANATION_UNAVAILABLE, inline=False)
+    elif not fields:
+        embed.add_field(name="Explanation", value=EXPLANATION_PENDING, inline=False)
+    else:
+        for key, value in fields.items():
+            embed.add_field(name=key, value=value, inline=False)
+
+    embed.set_image(url=comic_data.image_url)
     embed.set_footer(
         text=f"Posted at {datetime.datetime.now(tz=timezone).strftime("%Y/%m/%d %H:%M:%S")}"
     )
     return embed
+
+
+async def setup(bot):
+    # entry point for bot.load_extension
+    await bot.add_cog(
+        MonkeyUserCog(bot=bot, config=bot.config, logger=bot.logger),
+        guild=discord.Object(id=bot.config["SERVER_ID"]),
+    )
@@ -1,12 +1,27 @@
+import asyncio
 import discord
 import datetime
 from discord import app_commands
 from discord.ext import commands, tasks
+from cogs.embed_stream import (
+    EXPLANATION_PENDING,
+    EXPLANATION_UNAVAILABLE,
+    EmbedStream,
+)
 from scrapers.turnoff_us_scraper import TurnOffUsScraper
+from scrapers.llm_scheduler import Priority
 from objects.comic_object import ComicData
 
 timezone = datetime.timezone(datetime.timedelta(hours=8))
 task_time = datetime.time(hour=8, minute=0, second=0, tzinfo=timezone)
+# scheduled posts are picked and explained ahead of task_time; later runs are
+# retries and do nothing once a post is ready
+prepare_times = [
+    datetime.time(hour=hour, minute=0, second=0, tzinfo=timezone) for hour in (4, 6, 7)
+]
+catalog_refresh_minutes = 30
+# new releases are polled with a conditional GET, so this can be frequent
+release_check_minutes = 5
 
 
 class TurnOffUsCog(commands.Cog):
@@ -27,12 +42,38 @@ class TurnOffUsCog(commands.Cog):
         self.bot = bot
         self.config = config
         self.logger = logger
-        self.turnoff_us_scraper = TurnOffUsScraper(config=config, logger=logger)
+        self.next_post_embed = None
+        self.next_post_comic = None
+        self.turnoff_us_scraper = TurnOffUsScraper(
+            config=config,
+            logger=logger,
+            session=bot.http_session,
+            explanation_cache=bot.explanation_cache,
+            llm_scheduler=bot.llm_scheduler,
+            metrics=bot.metrics,
+        )
 
     @commands.Cog.listener()
     async def on_ready(self):
         if not self.post_turnoff_us_comic.is_running():
             self.post_turnoff_us_comic.start()
+        if not self.prepare_turnoff_us_comic.is_running():
+            self.prepare_turnoff_us_comic.start()
+            # also prepare right away in case the bot starts after prepare_times
+            self.startup_prepare_task = asyncio.create_task(
+                self.prepare_turnoff_us_comic()
+            )
+        if not self.refresh_turnoff_us_catalog.is_running():
+            self.refresh_turnoff_us_catalog.start()
+        if not self.watch_turnoff_us_releases.is_running():
+            self.watch_turnoff_us_releases.start()
+
+    async def cog_unload(self):
+        self.post_turnoff_us_comic.cancel()
+        self.prepare_turnoff_us_comic.cancel()
+        self.refresh_turnoff_us_catalog.cancel()
+        self.watch_turnoff_us_releases.cancel()
+        await self.turnoff_us_scraper.close()
 
     @app_commands.command(
         name="turnoff_us", description="Get the usable options for turnoff.us"
@@ -68,9 +109,28 @@ class TurnOffUsCog(commands.Cog):
     async def post_turnoff_us_comic(self):
         channel = self.bot.get_channel(int(self.config["TURNOFF_US_CHANNEL_ID"]))
         if channel:
-            result = await self.turnoff_us_scraper.random_comic()
-            embed = await _create_comic_embed(self.turnoff_us_scraper, result)
-            await channel.send(embed=embed)
+            embed, comic = self.next_post_embed, self.next_post_comic
+            self.next_post_embed = self.next_post_comic = None
+            if embed is None:
+                self.logger.warning("turnoff.us: No prepared comic, fetching one now.")
+                result = await self.turnoff_us_scraper.random_comic(skip_posted=True)
+                if result is None:
+                    self.logger.error("turnoff.us: Failed to fetch a comic to post.")
+                    return
+                # post the comic right away and fill in the explanation when ready
+                await _stream_comic_embed(
+                    lambda embed: channel.send(embed=embed),
+                    self.turnoff_us_scraper,
+                    result,
+                    Priority.SCHEDULED,
+                )
+                await self.turnoff_us_scraper.record_post(result)
+            else:
+                embed.set_footer(
+                    text=f"Posted at {datetime.datetime.now(tz=timezone).strftime('%Y/%m/%d %H:%M:%S')}"
+                )
+                await channel.send(embed=embed)
+                await self.turnoff_us_scraper.record_post(comic)
         else:
             self.logger.error("turnoff.us channel not found.")
 
@@ -78,6 +138,72 @@ class TurnOffUsCog(commands.Cog):
     async def before_post_turnoff_us_comic_task(self):
         await self.bot.wait_until_ready()
 
+    @tasks.loop(time=prepare_times)
+    async def prepare_turnoff_us_comic(self):
+        if self.next_post_embed is not None:
+            return
+        result = await self.turnoff_us_scraper.prepare_comic()
+        if result is None:
+            self.logger.error("turnoff.us: Failed to prepare the scheduled comic.")
+            return
+        self.next_post_comic = result
+        self.next_post_embed = await _create_comic_embed(
+            self.turnoff_us_scraper, result
+        )
+
+    @prepare_turnoff_us_comic.before_loop
+    async def before_prepare_turnoff_us_comic_task(self):
+        await self.bot.wait_until_ready()
+
+    @tasks.loop(minutes=catalog_refresh_minutes)
+    async def refresh_turnoff_us_catalog(self):
+        await self.turnoff_us_scraper.refresh_catalog()
+
+    @tasks.loop(minutes=release_check_minutes)
+    async def watch_turnoff_us_releases(self):
+        comics = await self.turnoff_us_scraper.check_new_releases()
+        if not comics:
+            return
+        channel = self.bot.get_channel(int(self.config["TURNOFF_US_CHANNEL_ID"]))
+        if not channel:
+            self.logger.error("turnoff.us channel not found.")
+            return
+        for comic in comics:
+            # explain before posting, so the release goes out complete
+            img_description_json = await self.turnoff_us_scraper.describe_comic(
+                comic, Priority.SCHEDULED
+            )
+            if img_description_json.get("Core_concept") == "Error":
+                if not self.turnoff_us_scraper.release_explanation_failed(comic):
+                    # the next check retries it, and the releases after it wait
+                    self.logger.warning(
+                        "turnoff.us: Explaining new release %s failed, retrying later",
+                        comic.source_url,
+                    )
+                    break
+            # a re-upload of a posted comic is only recognised by its image,
+            # which describing it has just fingerprinted
+            if await self.turnoff_us_scraper.was_posted(comic):
+                await self.turnoff_us_scraper.mark_released(comic)
+                continue
+            try:
+                with self.turnoff_us_scraper.metrics.time(
+                    "discord_send", self.turnoff_us_scraper.comic_name
+                ):
+                    await channel.send(
+                        embed=_build_comic_embed(comic, img_description_json)
+                    )
+                await self.turnoff_us_scraper.record_post(comic)
+            except discord.HTTPException as e:
+                # not marked as released, so the next check posts it again
+                self.logger.error("turnoff.us: Failed to post new release: %s", e)
+                break
+            await self.turnoff_us_scraper.mark_released(comic)
+
+    @watch_turnoff_us_releases.before_loop
+    async def before_watch_turnoff_us_releases_task(self):
+        await self.bot.wait_until_ready()
+
 
 class TurnOffUsSearchModal(discord.ui.Modal, title="Search"):
     """
@@ -115,12 +241,7 @@ class TurnOffUsSearchModal(discord.ui.Modal, title="Search"):
             await interaction.followup.send("No results found.", ephemeral=True)
             return
 
-        embed = await _create_comic_embed(self.turnoff_us_scraper, result)
-        await interaction.followup.send(
-            embed=embed,
-            view=TurnOffUsButtonView(self.turnoff_us_scraper),
-            ephemeral=True,
-        )
+        await _send_comic_followup(interaction, self.turnoff_us_scraper, result)
 
 
 class TurnOffUsButtonView(discord.ui.View):
@@ -150,12 +271,7 @@ class TurnOffUsButtonView(discord.ui.View):
             await interaction.followup.send("Try again.", ephemeral=True)
             return
 
-        embed = await _create_comic_embed(self.turnoff_us_scraper, result)
-        await interaction.followup.send(
-            embed=embed,
-            view=TurnOffUsButtonView(self.turnoff_us_scraper),
-            ephemeral=True,
-        )
+        await _send_comic_followup(interaction, self.turnoff_us_scraper, result)
 
     @discord.ui.button(label="Random Select", style=discord.ButtonStyle.red, emoji="👀")
     async def random_button_callback(
@@ -167,12 +283,7 @@ class TurnOffUsButtonView(discord.ui.View):
             await interaction.followup.send("Try again.", ephemeral=True)
             return
 
-        embed = await _create_comic_embed(self.turnoff_us_scraper, result)
-        await interaction.followup.send(
-            embed=embed,
-            view=TurnOffUsButtonView(self.turnoff_us_scraper),
-            ephemeral=True,
-        )
+        await _send_comic_followup(interaction, self.turnoff_us_scraper, result)
 
     @discord.ui.button(
         label="Search Comic in turnoff.us", style=discord.ButtonStyle.green, emoji="❓"
@@ -193,16 +304,87 @@ class TurnOffUsButtonView(discord.ui.View):
 async def _create_comic_embed(
     turn_off_us_scraper: TurnOffUsScraper, comic_data: ComicData
 ):
-    img_url = comic_data.image_url
-    img_description_json = await turn_off_us_scraper.describe_comic()
+    img_description_json = await turn_off_us_scraper.describe_comic(comic_data)
+    return _build_comic_embed(comic_data, img_description_json)
 
-    embed = discord.Embed(title=comic_data.title, url=comic_data.source_url)
 
-    for key, value in img_description_json.items():
-        embed.add_field(name=key, value=value, inline=False)
+async def _send_comic_followup(
+    interaction: discord.Interaction,
+    turn_off_us_scraper: TurnOffUsScraper,
+    comic_data: ComicData,
+):
+    """Send the comic as a followup right away and stream its explanation into it."""
+    await _stream_comic_embed(
+        lambda embed: interaction.followup.send(
+            embed=embed,
+            view=TurnOffUsButtonView(turn_off_us_scraper),
+            ephemeral=True,
+            wait=True,
+        ),
+        turn_off_us_scraper,
+        comic_data,
+    )
+
+
+async def _stream_comic_embed(
+    send,
+    turn_off_us_scraper: TurnOffUsScraper,
+    comic_data: ComicData,
+    priority: Priority = Priority.INTERACTIVE,
+):
+    """Post the comic through `send` at once, then edit its explanation in."""
+
+    async def timed_send(embed: discord.Embed):
+        with turn_off_us_scraper.metrics.time(
+            "discord_send", turn_off_us_scraper.comic_name
+        ):
+            return await send(embed)
 
-    embed.set_image(url=img_url)
+    stream = EmbedStream(timed_send)
+    await stream.update(_build_comic_embed(comic_data, None))
+
+    async def on_partial(partial: dict):
+        await stream.update(_build_comic_embed(comic_data, partial))
+
+    try:
+        img_description_json = await turn_off_us_scraper.describe_comic(
+            comic_data, priority, on_partial=on_partial
+        )
+    except Exception:
+        # never leave the message stuck on the pending placeholder
+        await stream.finish(_build_comic_embed(comic_data, {"Core_concept": "Error"}))
+        raise
+    await stream.finish(_build_comic_embed(comic_data, img_description_json))
+
+
+def _build_comic_embed(comic_data: ComicData, img_description_json: dict | None):
+    """
+    Build the comic embed; `img_description_json` is None while the explanation
+    is pending, partial while it streams in, and an error analysis on failure.
+    """
+    embed = discord.Embed(title=comic_data.title, url=comic_data.source_url)
+
+    fields = {
+        key: value for key, value in (img_description_json or {}).items() if value
+    }
+    if fields.get("Core_concept") == "Error":
+        embed.add_field(name="Explanation", value=EXPLANATION_UNAVAILABLE, inline=False)
+    elif not fields:
+        embed.add_field(name="Explanation", value=EXPLANATION_PENDING, inline=False)
+    else:
+        for key, value in fields.items():
+            embed.add_field(name=key, value=value, inline=False)
+
+    embed.set_image(url=comic_data.image_url)
     embed.set_footer(
         text=f"Posted at {datetime.datetime.now(tz=timezone).strftime("%Y/%m/%d %H:%M:%S")}"
     )
     return embed
+
+
+async def setup(bot):
+    # entry point for bot.load_extension
+    await bot.add_cog(
+        TurnOffUsCog(bot=bot, config=bot.config, logger=bot.logger),
+        guild=discord.Object(id=bot.config["SERVER_ID"]),
+    )
@@ -3,6 +3,10 @@ import os
 import discord
 from discord import app_commands
 from discord.ext import commands
+from scrapers.metrics import PERCENTILE_WINDOW
+
+# leave room in the 4096 character embed description for the code block
+STATS_TABLE_LIMIT = 4000
 
 
 class UtilCog(commands.Cog):
@@ -37,6 +41,9 @@ Change the search engine setting
 
 **/image_llm**
 Change the image LLM setting
+
+**/stats**
+Show latency, error and cache statistics (admins only)
         """
         embed = discord.Embed(title="Help", description=description, color=0x00FF00)
 
@@ -53,12 +60,84 @@ Change the image LLM setting
         )
         embed.add_field(name="🔍 Search engine", value=current_engine, inline=False)
         embed.add_field(name="🤖 Image LLM", value=current_llm, inline=False)
+        cache_stats = self.bot.explanation_cache.stats()
+        embed.add_field(
+            name="🗃️ Explanation cache",
+            value=f"{cache_stats['hits']} hits / {cache_stats['misses']} misses "
+            f"({cache_stats['hit_ratio']:.0%} hit ratio), "
+            f"{cache_stats['entries']} cached comics",
+            inline=False,
+        )
+        llm_stats = self.bot.llm_scheduler.stats()
+        embed.add_field(
+            name="⏳ LLM queue",
+            value=f"{llm_stats['running']} running, "
+            f"{sum(llm_stats['queue_depth'].values())} waiting, "
+            f"avg wait {llm_stats['wait_avg']:.1f}s "
+            f"(p95 {llm_stats['wait_p95']:.1f}s), {llm_stats['shed']} shed",
+            inline=False,
+        )
         embed.set_footer(
             text="Use /search_engine and /image_llm to change these settings"
         )
 
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
+    @app_commands.command(
+        name="stats", description="Show latency, error and cache statistics"
+    )
+    @app_commands.default_permissions(administrator=True)
+    async def stats_command(self, interaction: discord.Interaction):
+        summary = self.bot.metrics.summary()
+        rows = [
+            f"{'stage':<16}{'source':<16}{'n':>6}{'p50':>8}{'p95':>8}{'p99':>8}{'err':>5}"
+        ]
+        for stage in summary["stages"]:
+            rows.append(
+                f"{stage['stage']:<16}{stage['source'][:15]:<16}{stage['count']:>6}"
+                f"{_format_seconds(stage['p50']):>8}{_format_seconds(stage['p95']):>8}"
+                f"{_format_seconds(stage['p99']):>8}{stage['errors']:>5}"
+            )
+        table = "\n".join(rows)
+        if len(table) > STATS_TABLE_LIMIT:
+            table = table[:STATS_TABLE_LIMIT].rsplit("\n", 1)[0] + "\n..."
+
+        embed = discord.Embed(
+            title="GenAI-Comics-Bot Stats",
+            description=(
+                f"```\n{table}\n```"
+                if summary["stages"]
+                else "No requests recorded yet."
+            ),
+            color=0x00FF00,
+        )
+        cache_lines = [
+            f"{cache['cache']} ({cache['source']}): {cache['hit_ratio']:.0%} "
+            f"of {cache['hits'] + cache['misses']}"
+            for cache in summary["caches"]
+        ]
+        embed.add_field(
+            name="🗃️ Cache hit ratios",
+            value="\n".join(cache_lines)[:1024] or "No lookups yet.",
+            inline=False,
+        )
+        token_lines = [
+            f"{tokens['source']}: {tokens['input'] // max(tokens['calls'], 1)} in / "
+            f"{tokens['output'] // max(tokens['calls'], 1)} out per call "
+            f"({tokens['calls']} calls)"
+            for tokens in summary["tokens"]
+        ]
+        embed.add_field(
+            name="🔢 LLM tokens",
+            value="\n".join(token_lines)[:1024] or "No LLM calls yet.",
+            inline=False,
+        )
+        embed.set_footer(
+            text=f"Latencies over the last {PERCENTILE_WINDOW} calls per stage"
+        )
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
     # Set the search engine command
     @app_commands.command(
         name="search_engine", description="Change the search engine setting"
@@ -105,3 +184,22 @@ Change the image LLM setting
         await interaction.response.send_message(
             f"Image LLM set to {llm.name}", ephemeral=True
         )
+
+
+# =================================================
+# The following is helper functions
+# =================================================
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds < 1:
+        return f"{seconds * 1000:.0f}ms"
+    return f"{seconds:.1f}s"
+
+
+async def setup(bot):
+    # entry point for bot.load_extension
+    await bot.add_cog(
+        UtilCog(bot=bot, config=bot.config, logger=bot.logger),
+        guild=discord.Object(id=bot.config["SERVER_ID"]),
+    )
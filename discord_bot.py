@@ -1,16 +1,33 @@
 import asyncio
 import os
 import time
+
+# taken before the heavy imports below, as the start of the "boot" stage
+BOOT_STARTED = time.perf_counter()
+
 import discord
 import logging
 import datetime
-from logging.handlers import TimedRotatingFileHandler
+import json
+import queue
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 from discord.ext import commands
 from dotenv import dotenv_values
-from cogs.turnoff_us_cog import TurnOffUsCog
-from cogs.xkcd_cog import XkcdCog
-from cogs.monkey_user_cog import MonkeyUserCog
-from cogs.util_cog import UtilCog
+from scrapers.explanation_cache import ExplanationCache
+from scrapers.http_session import create_http_session
+from scrapers.llm_scheduler import LLMScheduler
+from scrapers.metrics import StageMetrics, start_metrics_server
+from scrapers.scraper import preload_llm_modules
+from scrapers.search_backends import preload_search_backend
+
+# loaded in main() rather than imported here, so their load can be timed
+COG_EXTENSIONS = (
+    "cogs.util_cog",
+    "cogs.xkcd_cog",
+    "cogs.turnoff_us_cog",
+    "cogs.monkey_user_cog",
+)
 
 
 class Client(commands.Bot):
@@ -18,12 +35,73 @@ class Client(commands.Bot):
         super().__init__(*args, **kwargs)
         self.config = config
         self.logger = logger
+        # seconds spent in each startup stage, reported once the bot is ready
+        self.startup_timings = {}
+        self._connect_started = None
+        self._preload_task: asyncio.Task | None = None
+        self.metrics = StageMetrics()
+        self.metrics_runner = None
+        # one pooled HTTP session shared by every scraper, closed in close()
+        self.http_session = create_http_session(
+            trace_configs=[self.metrics.trace_config()]
+        )
+        self.explanation_cache = ExplanationCache(
+            path=os.path.join(config.get("CACHE_DIR", "cache"), "explanations.db"),
+            max_entries=int(config.get("EXPLANATION_CACHE_MAX_ENTRIES", 5000)),
+            ttl=float(config.get("EXPLANATION_CACHE_TTL_DAYS", 30)) * 86400,
+        )
+        self.llm_scheduler = LLMScheduler(
+            max_concurrency=int(config.get("LLM_MAX_CONCURRENCY", 4)),
+            tokens_per_minute=int(config.get("LLM_TOKENS_PER_MINUTE", 30000)),
+            max_queue_depth=int(config.get("LLM_MAX_QUEUE_DEPTH", 50)),
+            metrics=self.metrics,
+        )
+        self.metrics.add_gauge(
+            "llm_queue_depth", lambda: self.llm_scheduler.queue_depth()
+        )
+        self.metrics.add_gauge(
+            "llm_running", lambda: self.llm_scheduler.stats()["running"]
+        )
+        self.metrics.add_gauge(
+            "explanation_cache_entries",
+            lambda: self.explanation_cache.stats()["entries"],
+        )
 
         os.environ["GOOGLE_API_KEY"] = config["GOOGLE_API_KEY"]
         os.environ["GROQ_API_KEY"] = config["GROQ_API_KEY"]
         os.environ["SEARCH_ENGINE"] = config["SEARCH_ENGINE"]
         os.environ["IMAGE_LLM"] = config["IMAGE_LLM"]
 
+    @contextmanager
+    def startup_stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.startup_timings[name] = self.startup_timings.get(name, 0.0) + (
+                time.perf_counter() - started
+            )
+
+    async def start(self, token, *, reconnect=True):
+        with self.startup_stage("login"):
+            await self.login(token)
+        self._connect_started = time.perf_counter()
+        await self.connect(reconnect=reconnect)
+
+    async def setup_hook(self):
+        # the metrics endpoint shares the bot's event loop; empty port disables it
+        port = self.config.get("METRICS_PORT")
+        if port:
+            # the container sets METRICS_HOST in its environment so that the
+            # published port reaches the endpoint
+            host = os.environ.get("METRICS_HOST") or self.config.get(
+                "METRICS_HOST", "127.0.0.1"
+            )
+            self.metrics_runner = await start_metrics_server(
+                self.metrics, host, int(port)
+            )
+            self.logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+
     async def on_ready(self):
         timezone = datetime.timezone(datetime.timedelta(hours=8))
         self.logger.info(
@@ -37,29 +115,100 @@ class Client(commands.Bot):
         self.logger.info(
             f"==============================================================="
         )
+        first_ready = self._connect_started is not None
+        if first_ready:
+            self.startup_timings["gateway"] = (
+                time.perf_counter() - self._connect_started
+            )
+            self._connect_started = None
         try:
             guild = discord.Object(id=self.config["SERVER_ID"])
-            synced = await self.tree.sync(guild=guild)
+            with self.startup_stage("tree_sync"):
+                synced = await self.tree.sync(guild=guild)
             self.logger.info(f"Synced {len(synced)} commands to guild")
 
         except Exception as e:
             self.logger.error(f"Error syncing commands: {e}")
 
+        if first_ready:
+            self._log_startup_timings()
+            # load the LLM and search clients now rather than on the first click
+            self._preload_task = asyncio.create_task(self._preload_providers())
+
+    def _log_startup_timings(self):
+        total = sum(self.startup_timings.values())
+        stages = ", ".join(
+            f"{name} {seconds:.2f}s" for name, seconds in self.startup_timings.items()
+        )
+        self.logger.info("Startup took %.2fs: %s", total, stages)
+
+    async def _preload_providers(self):
+        # timed on its own: it runs after startup, off the event loop
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(preload_llm_modules)
+            await asyncio.to_thread(preload_search_backend, os.environ["SEARCH_ENGINE"])
+        except ImportError as e:
+            self.logger.error(f"Error preloading provider modules: {e}")
+            return
+        self.logger.info(
+            "Preloaded provider modules in %.2fs", time.perf_counter() - started
+        )
+
+    async def close(self):
+        await super().close()
+        if self.metrics_runner is not None:
+            await self.metrics_runner.cleanup()
+        if not self.http_session.closed:
+            await self.http_session.close()
+        self.logger.info(f"Explanation cache: {self.explanation_cache.stats()}")
+        self.explanation_cache.close()
+
 
 def utc_plus_8_converter(sec, what=None):
     return time.gmtime(sec + 8 * 3600)
 
 
-async def main():
-    # load env variables
-    config = {**dotenv_values(".env.secret"), **dotenv_values(".env.public")}
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queue handler that leaves all formatting to the listener thread.
+
+    The stock QueueHandler formats each message in the logging thread, which
+    for the bot is the event loop. Records are only read by the in-process
+    listener, so they can be queued as they are.
+    """
 
+    def prepare(self, record):
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, for log shippers."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def setup_logging(config) -> QueueListener:
+    """
+    Route the "discord" logger through a queue to a file-writing thread.
+
+    Logging calls only enqueue the record; formatting, file I/O and midnight
+    rotation happen on the listener thread, so log volume never blocks the
+    event loop. Set LOG_FORMAT="json" for structured output. The caller starts
+    and stops the returned listener.
+    """
     if not os.path.exists("logs"):
         os.mkdir("logs")
 
-    # setup logging
-    logger = logging.getLogger("discord")
-    logger.setLevel(logging.INFO)
     handler = TimedRotatingFileHandler(
         filename="logs/discord.log",
         encoding="utf-8",
@@ -67,12 +216,29 @@ async def main():
         interval=1,
         backupCount=30,
     )
-    handler.setFormatter(
-        logging.Formatter("%(asctime)s:%(levelname)s:%(name)s: %(message)s")
-    )
-    handler.converter = utc_plus_8_converter
+    if config.get("LOG_FORMAT", "text") == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter("%(asctime)s:%(levelname)s:%(name)s: %(message)s")
+    formatter.converter = utc_plus_8_converter
+    handler.setFormatter(formatter)
     handler.suffix = "%Y-%m-%d"
-    logger.addHandler(handler)
+
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger("discord")
+    logger.setLevel(logging.INFO)
+    logger.addHandler(DeferredQueueHandler(log_queue))
+    return QueueListener(log_queue, handler, respect_handler_level=True)
+
+
+async def main():
+    # load env variables
+    config = {**dotenv_values(".env.secret"), **dotenv_values(".env.public")}
+
+    # setup logging
+    log_listener = setup_logging(config)
+    log_listener.start()
+    logger = logging.getLogger("discord")
 
     # initialize intents
     intents = discord.Intents.default()
@@ -81,26 +247,20 @@ async def main():
 
     # initialize bot
     bot = Client(config=config, logger=logger, command_prefix="!", intents=intents)
+    # wall time of the imports above and setting up logging and the bot
+    bot.startup_timings["boot"] = time.perf_counter() - BOOT_STARTED
 
-    guild = discord.Object(id=config["SERVER_ID"])
-    await bot.add_cog(
-        UtilCog(bot=bot, config=config, logger=logger),
-        guild=guild,
-    )
-    await bot.add_cog(
-        XkcdCog(bot=bot, config=config, logger=logger),
-        guild=guild,
-    )
-    await bot.add_cog(
-        TurnOffUsCog(bot=bot, config=config, logger=logger),
-        guild=guild,
-    )
-    await bot.add_cog(
-        MonkeyUserCog(bot=bot, config=config, logger=logger),
-        guild=guild,
-    )
+    for extension in COG_EXTENSIONS:
+        # load_extension imports and executes the cog module itself
+        with bot.startup_stage("cog_load"):
+            await bot.load_extension(extension)
 
-    await bot.start(config["DISCORD_BOT_TOKEN"])
+    try:
+        async with bot:
+            await bot.start(config["DISCORD_BOT_TOKEN"])
+    finally:
+        # flush queued records before exiting
+        log_listener.stop()
 
 
 if __name__ == "__main__":
@@ -4,11 +4,54 @@ from dataclasses import dataclass
 
 @dataclass
 class ComicData:
+    """
+    Self-contained context for one fetched comic.
+
+    Scrapers return a fresh instance per fetch and every later stage (e.g.
+    describing the comic) takes it explicitly, so a single scraper instance can
+    serve many in-flight interactions without sharing mutable state.
+    """
+
     title: str
     description: str
     image_url: str
     source_url: str
     source_name: str
+    transcript: str | None = None
+
+    @property
+    def is_animated(self) -> bool:
+        return is_animated_image(self.image_url)
+
+
+@dataclass
+class CatalogEntry:
+    """
+    One known comic in a source's local catalog.
+
+    Only `slug` and `url` are required; the remaining details are filled in once
+    the comic has been fetched. `ordinal` orders the catalog, larger is newer.
+    """
+
+    slug: str
+    url: str
+    ordinal: int | None = None
+    title: str | None = None
+    image_url: str | None = None
+    alt_text: str | None = None
+    animated: bool | None = None
+
+    def is_complete(self) -> bool:
+        return self.title is not None and self.image_url is not None
+
+    def to_comic_data(self, source_name: str) -> ComicData:
+        return ComicData(
+            title=self.title,
+            description=self.alt_text,
+            image_url=self.image_url,
+            source_url=self.url,
+            source_name=source_name,
+        )
 
 
 class ComicAnalysis(BaseModel):
@@ -18,3 +61,8 @@ class ComicAnalysis(BaseModel):
     Explanation: str = Field(
         description="Explain the joke, puns, and alt-text clearly for a general audience under 950 chars"
     )
+
+
+def is_animated_image(image_url: str) -> bool:
+    # animated comics are GIFs, which the vision LLM cannot explain
+    return image_url.lower().endswith(".gif")
@@ -0,0 +1,209 @@
+import asyncio
+import random
+from dataclasses import astuple, fields
+from objects.comic_object import CatalogEntry, ComicData
+from scrapers.sqlite_store import SqliteStore, normalize_url
+
+_COLUMNS = [field.name for field in fields(CatalogEntry)]
+
+
+class ComicCatalog(SqliteStore):
+    """
+    Local catalog of every known comic from one source.
+
+    The catalog is kept in memory for O(1) random and latest selection and is
+    persisted to SQLite so it survives restarts. Scrapers merge the upstream
+    archive listing into it in the background and record the details (title,
+    image URL, alt text, animated flag) of every comic they fetch, so most
+    selections can be served without touching the network.
+
+    Comics flagged as animated are kept out of random selection, so they are
+    skipped without ever being fetched again.
+
+    The newest comic announced by the release watcher is remembered as the
+    source's release marker, so releases are not missed or posted twice
+    across restarts.
+    """
+
+    def __init__(self, path: str, source: str):
+        super().__init__(path)
+        self.source = source
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS comics (
+                source TEXT NOT NULL,
+                slug TEXT NOT NULL,
+                url TEXT NOT NULL,
+                ordinal INTEGER NOT NULL,
+                title TEXT,
+                image_url TEXT,
+                alt_text TEXT,
+                animated INTEGER,
+                PRIMARY KEY (source, slug)
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS release_markers (
+                source TEXT PRIMARY KEY,
+                slug TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+        self._entries: dict[str, CatalogEntry] = {}
+        # slugs eligible for random selection, with their positions for O(1) removal
+        self._eligible: list[str] = []
+        self._eligible_positions: dict[str, int] = {}
+        self._by_url: dict[str, str] = {}
+        self._latest: CatalogEntry | None = None
+
+        rows = self._conn.execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM comics WHERE source = ?", (source,)
+        ).fetchall()
+        for row in rows:
+            entry = CatalogEntry(*row)
+            if entry.animated is not None:
+                entry.animated = bool(entry.animated)
+            self._add(entry)
+
+        row = self._conn.execute(
+            "SELECT slug FROM release_markers WHERE source = ?", (source,)
+        ).fetchone()
+        self._release_marker: str | None = row[0] if row else None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, slug: str) -> CatalogEntry | None:
+        return self._entries.get(slug)
+
+    def get_by_url(self, url: str) -> CatalogEntry | None:
+        slug = self._by_url.get(normalize_url(url))
+        return self._entries.get(slug) if slug is not None else None
+
+    def random_entry(self) -> CatalogEntry | None:
+        """Pick a random comic that is not known to be animated."""
+        if not self._eligible:
+            return None
+        return self._entries[random.choice(self._eligible)]
+
+    def latest_entry(self) -> CatalogEntry | None:
+        return self._latest
+
+    def entries(self) -> list[CatalogEntry]:
+        """Every known comic, newest first."""
+        return sorted(self._entries.values(), key=lambda e: e.ordinal, reverse=True)
+
+    def release_marker(self) -> str | None:
+        """Slug of the newest comic the release watcher has seen, if any."""
+        return self._release_marker
+
+    async def set_release_marker(self, slug: str):
+        if slug != self._release_marker:
+            self._release_marker = slug
+            await asyncio.to_thread(self._save_release_marker, slug)
+
+    def incomplete_entries(self, limit: int) -> list[CatalogEntry]:
+        # newest first, so recent comics get their details filled in earliest
+        incomplete = [e for e in self._entries.values() if not e.is_complete()]
+        incomplete.sort(key=lambda e: e.ordinal, reverse=True)
+        return incomplete[:limit]
+
+    async def merge(self, listing: list[CatalogEntry]) -> list[CatalogEntry]:
+        """
+        Merge an upstream archive listing into the catalog.
+
+        `listing` is expected newest first. Entries without an ordinal are
+        numbered after the current newest comic, preserving that order. Known
+        comics keep their ordinal and take any details the listing provides.
+
+        Returns the entries that were not in the catalog before.
+        """
+        new_entries = [e for e in listing if e.slug not in self._entries]
+        next_ordinal = self._latest.ordinal + 1 if self._latest else 1
+        for offset, entry in enumerate(reversed(new_entries)):
+            if entry.ordinal is None:
+                entry.ordinal = next_ordinal + offset
+
+        changed = list(new_entries)
+        for entry in listing:
+            known = self._entries.get(entry.slug)
+            if known is not None and _apply_details(known, entry):
+                self._update_eligibility(known)
+                changed.append(known)
+
+        for entry in new_entries:
+            self._add(entry)
+        if changed:
+            await asyncio.to_thread(self._save, changed)
+        return new_entries
+
+    async def record(self, comic: ComicData) -> CatalogEntry | None:
+        """Store the details of a fetched comic on its catalog entry, if known."""
+        entry = self.get_by_url(comic.source_url)
+        if entry is None:
+            return None
+
+        details = CatalogEntry(
+            slug=entry.slug,
+            url=entry.url,
+            title=comic.title,
+            image_url=comic.image_url,
+            alt_text=comic.description,
+            animated=comic.is_animated,
+        )
+        if _apply_details(entry, details):
+            self._update_eligibility(entry)
+            await asyncio.to_thread(self._save, [entry])
+        return entry
+
+    def _add(self, entry: CatalogEntry):
+        self._entries[entry.slug] = entry
+        self._by_url[normalize_url(entry.url)] = entry.slug
+        self._update_eligibility(entry)
+        if self._latest is None or entry.ordinal > self._latest.ordinal:
+            self._latest = entry
+
+    def _update_eligibility(self, entry: CatalogEntry):
+        eligible = entry.animated is not True
+        if eligible and entry.slug not in self._eligible_positions:
+            self._eligible_positions[entry.slug] = len(self._eligible)
+            self._eligible.append(entry.slug)
+        elif not eligible and entry.slug in self._eligible_positions:
+            # swap with the last slug and pop, keeping removal O(1)
+            position = self._eligible_positions.pop(entry.slug)
+            last = self._eligible.pop()
+            if last != entry.slug:
+                self._eligible[position] = last
+                self._eligible_positions[last] = position
+
+    def _save(self, entries: list[CatalogEntry]):
+        placeholders = ", ".join("?" for _ in range(len(_COLUMNS) + 1))
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO comics (source, {', '.join(_COLUMNS)}) "
+                f"VALUES ({placeholders})",
+                [(self.source, *astuple(entry)) for entry in entries],
+            )
+            self._conn.commit()
+
+    def _save_release_marker(self, slug: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO release_markers (source, slug) VALUES (?, ?)",
+                (self.source, slug),
+            )
+            self._conn.commit()
+
+
+def _apply_details(entry: CatalogEntry, details: CatalogEntry) -> bool:
+    changed = False
+    for name in ("title", "image_url", "alt_text", "animated"):
+        value = getattr(details, name)
+        if value is not None and getattr(entry, name) != value:
+            setattr(entry, name, value)
+            changed = True
+    return changed
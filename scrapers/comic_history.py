@@ -0,0 +1,224 @@
+import asyncio
+import time
+from collections import defaultdict
+from scrapers.image_store import ImageFingerprint
+from scrapers.sqlite_store import SqliteStore, normalize_url
+
+# images whose 64-bit hashes differ in at most this many bits are candidates
+DHASH_MAX_DISTANCE = 7
+# the 64-bit hash is split into bands; near duplicates share at least one
+DHASH_BANDS = 8
+DHASH_BAND_BITS = 64 // DHASH_BANDS
+# a candidate is only a copy if its 256-bit hash differs in at most this many
+# bits and its aspect ratio matches within this fraction
+FINE_DHASH_MAX_DISTANCE = 4
+ASPECT_RATIO_TOLERANCE = 0.02
+# schema version; version 0 merged images on the 64-bit hash alone
+SCHEMA_VERSION = 1
+
+
+class ComicHistory(SqliteStore):
+    """
+    Image fingerprints and post history of one source.
+
+    Every downloaded comic image is registered by the SHA-256 of its bytes and
+    its `ImageFingerprint`. A copy of a known image (e.g. a re-upload or a
+    re-encoded copy under another URL) is mapped to that image's canonical
+    digest. Mostly white line art hashes close together, so the 64-bit dHash
+    only finds candidates, through a band index (with at most 7 differing
+    bits, at least one of the 8 bands matches exactly); a candidate is a copy
+    only if its aspect ratio and 256-bit dHash match as well.
+
+    Canonical digests only serve the post history: posts are recorded by
+    comic URL and canonical digest, so recently posted comics, and copies of
+    them, are recognised from the catalog alone, without network access.
+
+    Everything is kept in memory and persisted to SQLite so it survives
+    restarts; writes run in a worker thread.
+    """
+
+    def __init__(self, path: str, source: str, post_ttl: float = 180 * 86400):
+        super().__init__(path)
+        self.source = source
+        self.post_ttl = post_ttl
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS posts (
+                source TEXT NOT NULL,
+                url TEXT NOT NULL,
+                canonical TEXT,
+                posted_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_posts_posted_at ON posts (posted_at)"
+        )
+        (version,) = self._conn.execute("PRAGMA user_version").fetchone()
+        if version < SCHEMA_VERSION:
+            # earlier canonical digests may name a different comic; posts are
+            # still recognised by URL
+            self._conn.execute("DROP TABLE IF EXISTS fingerprints")
+            self._conn.execute("UPDATE posts SET canonical = NULL")
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                source TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                dhash INTEGER NOT NULL,
+                fine_dhash TEXT NOT NULL,
+                width INTEGER NOT NULL,
+                height INTEGER NOT NULL,
+                canonical TEXT NOT NULL,
+                PRIMARY KEY (source, digest)
+            )
+            """
+        )
+        self._conn.commit()
+
+        self._canonical: dict[str, str] = {}
+        # canonical digest -> fingerprint, and (band, value) -> canonical digests
+        self._fingerprints: dict[str, ImageFingerprint] = {}
+        self._bands: dict[tuple[int, int], set[str]] = defaultdict(set)
+        self._posted_urls: dict[str, float] = {}
+        self._posted_images: dict[str, float] = {}
+
+        rows = self._conn.execute(
+            "SELECT digest, dhash, fine_dhash, width, height, canonical "
+            "FROM fingerprints WHERE source = ?",
+            (source,),
+        ).fetchall()
+        for digest, dhash, fine_dhash, width, height, canonical in rows:
+            fingerprint = ImageFingerprint(
+                _to_unsigned(dhash), int(fine_dhash, 16), width, height
+            )
+            self._add_fingerprint(digest, fingerprint, canonical)
+
+        rows = self._conn.execute(
+            "SELECT url, canonical, posted_at FROM posts "
+            "WHERE source = ? AND posted_at >= ? ORDER BY posted_at",
+            (source, time.time() - post_ttl),
+        ).fetchall()
+        for url, canonical, posted_at in rows:
+            self._add_post(url, canonical, posted_at)
+
+    def canonical(self, digest: str) -> str:
+        """The digest of the first known copy of this image (itself if unique)."""
+        return self._canonical.get(digest, digest)
+
+    async def add_image(self, digest: str, fingerprint: ImageFingerprint) -> str:
+        """Register a downloaded image and return its canonical digest."""
+        known = self._canonical.get(digest)
+        if known is not None:
+            return known
+
+        canonical = self._nearest(fingerprint) or digest
+        self._add_fingerprint(digest, fingerprint, canonical)
+        await asyncio.to_thread(self._save_fingerprint, digest, fingerprint, canonical)
+        return canonical
+
+    def was_posted(self, url: str, digest: str | None = None) -> bool:
+        """Whether the comic at `url`, or its image, was posted within `post_ttl`."""
+        cutoff = time.time() - self.post_ttl
+        if self._posted_urls.get(normalize_url(url), 0) >= cutoff:
+            return True
+        if digest is not None:
+            return self._posted_images.get(self.canonical(digest), 0) >= cutoff
+        return False
+
+    async def record_post(self, url: str, digest: str | None = None):
+        canonical = self.canonical(digest) if digest is not None else None
+        posted_at = time.time()
+        self._add_post(url, canonical, posted_at)
+        await asyncio.to_thread(self._save_post, url, canonical, posted_at)
+
+    def _nearest(self, fingerprint: ImageFingerprint) -> str | None:
+        candidates = set()
+        for band in range(DHASH_BANDS):
+            candidates |= self._bands.get(
+                (band, _band_value(fingerprint.dhash, band)), set()
+            )
+
+        best, best_distance = None, FINE_DHASH_MAX_DISTANCE + 1
+        for canonical in candidates:
+            known = self._fingerprints[canonical]
+            if (known.dhash ^ fingerprint.dhash).bit_count() > DHASH_MAX_DISTANCE:
+                continue
+            if not _same_aspect_ratio(known, fingerprint):
+                continue
+            distance = (known.fine_dhash ^ fingerprint.fine_dhash).bit_count()
+            if distance < best_distance:
+                best, best_distance = canonical, distance
+        return best
+
+    def _add_fingerprint(
+        self, digest: str, fingerprint: ImageFingerprint, canonical: str
+    ):
+        self._canonical[digest] = canonical
+        if canonical == digest:
+            # only canonical images are indexed, so a chain of small changes
+            # cannot drift arbitrarily far from the original
+            self._fingerprints[digest] = fingerprint
+            for band in range(DHASH_BANDS):
+                self._bands[(band, _band_value(fingerprint.dhash, band))].add(digest)
+
+    def _add_post(self, url: str, canonical: str | None, posted_at: float):
+        self._posted_urls[normalize_url(url)] = posted_at
+        if canonical is not None:
+            self._posted_images[canonical] = posted_at
+
+    # =================================================
+    # The following is blocking helpers run in a worker thread
+    # =================================================
+
+    def _save_fingerprint(
+        self, digest: str, fingerprint: ImageFingerprint, canonical: str
+    ):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fingerprints "
+                "(source, digest, dhash, fine_dhash, width, height, canonical) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.source,
+                    digest,
+                    _to_signed(fingerprint.dhash),
+                    f"{fingerprint.fine_dhash:064x}",
+                    fingerprint.width,
+                    fingerprint.height,
+                    canonical,
+                ),
+            )
+            self._conn.commit()
+
+    def _save_post(self, url: str, canonical: str | None, posted_at: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO posts (source, url, canonical, posted_at) "
+                "VALUES (?, ?, ?, ?)",
+                (self.source, url, canonical, posted_at),
+            )
+            self._conn.execute(
+                "DELETE FROM posts WHERE source = ? AND posted_at < ?",
+                (self.source, posted_at - self.post_ttl),
+            )
+            self._conn.commit()
+
+
+def _band_value(dhash: int, band: int) -> int:
+    return (dhash >> (band * DHASH_BAND_BITS)) & ((1 << DHASH_BAND_BITS) - 1)
+
+
+def _same_aspect_ratio(a: ImageFingerprint, b: ImageFingerprint) -> bool:
+    ratio = (a.width * b.height) / (a.height * b.width)
+    return abs(ratio - 1) <= ASPECT_RATIO_TOLERANCE
+
+
+# SQLite integers are signed 64-bit
+def _to_signed(value: int) -> int:
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
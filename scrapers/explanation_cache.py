@@ -0,0 +1,208 @@
+import asyncio
+import hashlib
+import json
+import time
+from scrapers.sqlite_store import SqliteStore
+
+# schema version; version 0 could key an explanation by another comic's image
+SCHEMA_VERSION = 1
+
+
+class ExplanationCache(SqliteStore):
+    """
+    Disk-backed cache of `ComicAnalysis` results.
+
+    Entries are keyed by the SHA-256 of the comic image and the vision model
+    id, so a comic is only sent to the LLM again when its image or the
+    configured model changes, and the same image under another URL is not
+    explained twice. The cache lives in a SQLite file and therefore survives
+    bot restarts.
+
+    Eviction is least-recently-used once `max_entries` is exceeded, and entries
+    older than `ttl` seconds are treated as misses and dropped. The digest of
+    each image URL is remembered as well, so a cache hit needs no network
+    access at all; it is dropped with the last explanation of its image, or
+    after `ttl` seconds. The entry count is kept in memory, so `stats` never
+    touches the database.
+    """
+
+    def __init__(self, path: str, max_entries: int = 5000, ttl: float = 30 * 86400):
+        super().__init__(path)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS explanations (
+                key TEXT PRIMARY KEY,
+                source_url TEXT NOT NULL,
+                image_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                analysis TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_explanations_accessed_at "
+            "ON explanations (accessed_at)"
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS image_digests (
+                image_url TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_explanations_image_hash "
+            "ON explanations (image_hash)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_image_digests_digest "
+            "ON image_digests (digest)"
+        )
+        (version,) = self._conn.execute("PRAGMA user_version").fetchone()
+        if version < SCHEMA_VERSION:
+            # version 0 keyed explanations by a perceptual-hash match, which
+            # could be another comic's image
+            self._conn.execute("DELETE FROM explanations")
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.commit()
+        self._entries = self._count()
+
+    @staticmethod
+    def make_key(image_hash: str, model: str) -> str:
+        return hashlib.sha256(f"{image_hash}\n{model}".encode("utf-8")).hexdigest()
+
+    async def get(self, image_hash: str, model: str) -> dict | None:
+        key = self.make_key(image_hash, model)
+        analysis = await asyncio.to_thread(self._get, key)
+        if analysis is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return analysis
+
+    async def contains(self, image_hash: str, model: str) -> bool:
+        """Whether an unexpired entry exists; unlike `get`, not counted as a lookup."""
+        key = self.make_key(image_hash, model)
+        return await asyncio.to_thread(self._contains, key)
+
+    async def set(self, source_url: str, image_hash: str, model: str, analysis: dict):
+        key = self.make_key(image_hash, model)
+        await asyncio.to_thread(
+            self._set, key, source_url, image_hash, model, json.dumps(analysis)
+        )
+
+    async def get_image_digest(self, image_url: str) -> str | None:
+        return await asyncio.to_thread(self._get_image_digest, image_url)
+
+    async def set_image_digest(self, image_url: str, digest: str):
+        await asyncio.to_thread(self._set_image_digest, image_url, digest)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "entries": self._entries,
+        }
+
+    # =================================================
+    # The following is blocking helpers run in a worker thread
+    # =================================================
+
+    def _get(self, key: str) -> dict | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT analysis, created_at FROM explanations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            analysis, created_at = row
+            if now - created_at > self.ttl:
+                self._delete_explanations("key = ?", (key,))
+                self._conn.commit()
+                return None
+
+            self._conn.execute(
+                "UPDATE explanations SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+        return json.loads(analysis)
+
+    def _contains(self, key: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created_at FROM explanations WHERE key = ?", (key,)
+            ).fetchone()
+        return row is not None and time.time() - row[0] <= self.ttl
+
+    def _set(self, key, source_url, image_hash, model, analysis):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO explanations "
+                "(key, source_url, image_hash, model, analysis, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, source_url, image_hash, model, analysis, now, now),
+            )
+            # drop expired entries, then the least recently used beyond the cap
+            self._delete_explanations("created_at < ?", (now - self.ttl,))
+            self._delete_explanations(
+                "key IN (SELECT key FROM explanations ORDER BY accessed_at DESC "
+                "LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.execute(
+                "DELETE FROM image_digests WHERE created_at < ?", (now - self.ttl,)
+            )
+            self._conn.commit()
+
+    def _delete_explanations(self, where: str, parameters: tuple):
+        # with the lock held; digests of images no longer explained for any
+        # model go as well
+        image_hashes = {
+            image_hash
+            for (image_hash,) in self._conn.execute(
+                f"DELETE FROM explanations WHERE {where} RETURNING image_hash",
+                parameters,
+            ).fetchall()
+        }
+        self._conn.executemany(
+            "DELETE FROM image_digests WHERE digest = ? AND NOT EXISTS ("
+            "SELECT 1 FROM explanations WHERE image_hash = ?)",
+            [(image_hash, image_hash) for image_hash in image_hashes],
+        )
+        self._entries = self._count()
+
+    def _count(self) -> int:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM explanations").fetchone()
+        return count
+
+    def _get_image_digest(self, image_url: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest, created_at FROM image_digests WHERE image_url = ?",
+                (image_url,),
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return row[0]
+
+    def _set_image_digest(self, image_url: str, digest: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO image_digests (image_url, digest, created_at) "
+                "VALUES (?, ?, ?)",
+                (image_url, digest, time.time()),
+            )
+            self._conn.commit()
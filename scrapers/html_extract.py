@@ -0,0 +1,48 @@
+import asyncio
+from lxml import etree
+
+# pages larger than this are parsed in a worker thread
+LARGE_PAGE_BYTES = 128 * 1024
+# parsing stops at the first chunk that contains the wanted image
+FEED_CHUNK_BYTES = 4096
+
+
+async def extract_image(
+    html: bytes, container_tag: str, container_class: str
+) -> tuple[bool, dict[str, str] | None]:
+    """
+    Find the first <img> inside a `<container_tag class="container_class">`.
+
+    Returns whether such a container was found and the image's attributes.
+    Only the start of the page up to the image is parsed, with lxml's pull
+    parser, instead of building a tree of the whole page; large pages are
+    parsed in a worker thread so they never block the event loop.
+    """
+    if len(html) > LARGE_PAGE_BYTES:
+        return await asyncio.to_thread(find_image, html, container_tag, container_class)
+    return find_image(html, container_tag, container_class)
+
+
+def find_image(
+    html: bytes, container_tag: str, container_class: str
+) -> tuple[bool, dict[str, str] | None]:
+    parser = etree.HTMLPullParser(events=("start",), tag=(container_tag, "img"))
+    container_found = False
+    for offset in range(0, len(html), FEED_CHUNK_BYTES):
+        parser.feed(html[offset : offset + FEED_CHUNK_BYTES])
+        for _, element in parser.read_events():
+            if element.tag == container_tag:
+                container_found = container_found or _has_class(
+                    element, container_class
+                )
+            elif any(
+                _has_class(ancestor, container_class)
+                for ancestor in element.iterancestors(container_tag)
+            ):
+                return True, dict(element.attrib)
+    parser.close()
+    return container_found, None
+
+
+def _has_class(element, class_name: str) -> bool:
+    return class_name in (element.get("class") or "").split()
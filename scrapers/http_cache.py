@@ -0,0 +1,95 @@
+import asyncio
+import json
+import time
+from dataclasses import astuple, dataclass, fields
+from scrapers.sqlite_store import SqliteStore
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    final_url: str  # after redirects
+    body: bytes
+    etag: str | None
+    last_modified: str | None
+    fetched_at: float  # when the upstream last confirmed this copy
+
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.body)
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+_COLUMNS = [field.name for field in fields(CachedResponse)]
+
+
+class HttpCache(SqliteStore):
+    """
+    On-disk cache of upstream responses that rarely change.
+
+    Each URL keeps its last successful body together with the `ETag` and
+    `Last-Modified` validators the upstream sent, so it can be revalidated
+    with a conditional GET that costs a 304 and no body when nothing changed.
+    Deciding when to revalidate is up to the caller (see `Scraper._get_cached`);
+    the cache only stores the last good copy, which also survives restarts.
+
+    Only a handful of index/latest URLs per source are cached, so there is no
+    eviction.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                final_url TEXT NOT NULL,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    async def get(self, url: str) -> CachedResponse | None:
+        return await asyncio.to_thread(self._get, url)
+
+    async def set(self, response: CachedResponse):
+        await asyncio.to_thread(self._set, response)
+
+    async def touch(self, url: str, fetched_at: float):
+        """Record that the upstream confirmed the cached copy is still current."""
+        await asyncio.to_thread(self._touch, url, fetched_at)
+
+    # =================================================
+    # The following is blocking helpers run in a worker thread
+    # =================================================
+
+    def _get(self, url: str) -> CachedResponse | None:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        return CachedResponse(*row) if row is not None else None
+
+    def _set(self, response: CachedResponse):
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO responses ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+                astuple(response),
+            )
+            self._conn.commit()
+
+    def _touch(self, url: str, fetched_at: float):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET fetched_at = ? WHERE url = ?", (fetched_at, url)
+            )
+            self._conn.commit()
@@ -0,0 +1,34 @@
+import aiohttp
+
+# Connection pool settings shared by every scraper
+TOTAL_CONNECTION_LIMIT = 100
+PER_HOST_CONNECTION_LIMIT = 10
+DNS_CACHE_TTL = 300  # seconds
+KEEPALIVE_TIMEOUT = 60  # seconds
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=10)
+
+
+def create_http_session(
+    trace_configs: list[aiohttp.TraceConfig] | None = None,
+) -> aiohttp.ClientSession:
+    """
+    Create the long-lived, pooled HTTP session used by all scrapers.
+
+    The session keeps connections alive between requests, caps the number of
+    concurrent connections per upstream host, and caches DNS lookups so that
+    repeated fetches against the same comic site reuse an open TCP+TLS
+    connection instead of paying a fresh handshake every time.
+
+    `trace_configs` are attached to the session, e.g. to record connection
+    timings. Must be called from within a running event loop. The caller owns the
+    session and is responsible for closing it on shutdown.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=TOTAL_CONNECTION_LIMIT,
+        limit_per_host=PER_HOST_CONNECTION_LIMIT,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+    )
+    return aiohttp.ClientSession(
+        connector=connector, timeout=REQUEST_TIMEOUT, trace_configs=trace_configs
+    )
@@ -0,0 +1,142 @@
+import asyncio
+import base64
+import io
+import math
+import os
+from dataclasses import dataclass
+from PIL import Image
+
+# the vision model (Llama 4) sees images as 336px tiles of 144 tokens each, up
+# to 16 tiles plus a thumbnail of the whole image when there is more than one
+VISION_TILE_SIZE = 336
+VISION_TOKENS_PER_TILE = 144
+VISION_MAX_TILES = 16
+
+
+class ImageStore:
+    """
+    Content-addressed store of comic images prepared for the vision LLM.
+
+    Images are keyed by the SHA-256 of the original download, so each comic
+    image is downloaded and processed once, however many URLs or comics point
+    at it. The stored copy is flattened onto white, downscaled so its longest
+    side is at most `max_side` pixels and re-encoded as JPEG, which keeps the
+    vision token count and the request size down. `data_url` turns it into the
+    base64 data URL sent inline to the model.
+
+    Files live under `directory`, sharded by the first two hex digits of the
+    digest. Decoding and encoding run in a worker thread.
+    """
+
+    def __init__(self, directory: str, max_side: int = 1008, quality: int = 85):
+        self.directory = directory
+        self.max_side = max_side
+        self.quality = quality
+
+    def path(self, digest: str) -> str:
+        # the processing settings are part of the name, so changing them
+        # prepares images afresh instead of reusing stale copies
+        return os.path.join(
+            self.directory, digest[:2], f"{digest}-{self.max_side}-q{self.quality}.jpg"
+        )
+
+    async def get(self, digest: str) -> bytes | None:
+        return await asyncio.to_thread(self._read, self.path(digest))
+
+    async def put(self, digest: str, original: bytes) -> bytes:
+        """Prepare `original` (the image whose SHA-256 is `digest`) and store it."""
+        return await asyncio.to_thread(self._prepare_and_write, digest, original)
+
+    @staticmethod
+    def data_url(image: bytes) -> str:
+        return f"data:image/jpeg;base64,{base64.b64encode(image).decode('ascii')}"
+
+    # =================================================
+    # The following is blocking helpers run in a worker thread
+    # =================================================
+
+    @staticmethod
+    def _read(path: str) -> bytes | None:
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _prepare_and_write(self, digest: str, original: bytes) -> bytes:
+        prepared = prepare_image(original, self.max_side, self.quality)
+        path = self.path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write then rename, so readers never see a partial file
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(prepared)
+        os.replace(temporary, path)
+        return prepared
+
+
+def prepare_image(original: bytes, max_side: int, quality: int) -> bytes:
+    """Flatten, downscale and re-encode an image as JPEG."""
+    flattened = _open_flattened(original)
+    flattened.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    output = io.BytesIO()
+    flattened.save(output, format="JPEG", quality=quality, optimize=True)
+    return output.getvalue()
+
+
+@dataclass(frozen=True)
+class ImageFingerprint:
+    """Perceptual fingerprint of an image, for recognising copies of it."""
+
+    # 64-bit dHash, coarse enough to index; 256-bit dHash to confirm a match
+    dhash: int
+    fine_dhash: int
+    width: int
+    height: int
+
+
+def fingerprint_image(image: bytes) -> ImageFingerprint:
+    """Difference hashes (8x8 and 16x16) and the size of an image."""
+    flattened = _open_flattened(image)
+    grayscale = flattened.convert("L")
+    return ImageFingerprint(
+        dhash=difference_hash(grayscale, 8),
+        fine_dhash=difference_hash(grayscale, 16),
+        width=flattened.width,
+        height=flattened.height,
+    )
+
+
+def difference_hash(image: Image.Image, size: int = 8) -> int:
+    """
+    `size`x`size`-bit perceptual hash (dHash) of a grayscale image.
+
+    Each bit says whether a pixel of a (size + 1) x size thumbnail is brighter
+    than its right neighbour, so re-encoded or rescaled copies of a picture
+    hash to the same or a nearby value. The thumbnail is area-averaged, which
+    keeps thin line art from flickering in and out between copies.
+    """
+    thumbnail = image.resize((size + 1, size), Image.Resampling.BOX)
+    pixels = list(thumbnail.getdata())
+    value = 0
+    for row in range(size):
+        for column in range(size):
+            left = pixels[row * (size + 1) + column]
+            value = value << 1 | (left > pixels[row * (size + 1) + column + 1])
+    return value
+
+
+def _open_flattened(image: bytes) -> Image.Image:
+    # transparent areas become white, like the page behind the comic
+    with Image.open(io.BytesIO(image)) as opened:
+        rgba = opened.convert("RGBA")
+    flattened = Image.new("RGB", rgba.size, "white")
+    flattened.paste(rgba, mask=rgba.getchannel("A"))
+    return flattened
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    """Approximate vision tokens the model spends on a `width`x`height` image."""
+    tiles = math.ceil(width / VISION_TILE_SIZE) * math.ceil(height / VISION_TILE_SIZE)
+    tiles = min(tiles, VISION_MAX_TILES)
+    return VISION_TOKENS_PER_TILE * (tiles + 1 if tiles > 1 else tiles)
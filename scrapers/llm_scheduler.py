@@ -0,0 +1,202 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+
+from scrapers.metrics import StageMetrics
+
+
+class Priority(IntEnum):
+    """Priority classes for LLM jobs; lower values are served first."""
+
+    INTERACTIVE = 0
+    SCHEDULED = 1
+    BACKFILL = 2
+
+
+class SchedulerSaturated(Exception):
+    """Raised when a job is shed because the LLM queue is full."""
+
+
+class LLMScheduler:
+    """
+    Central admission control for vision-LLM calls.
+
+    At most `max_concurrency` jobs run at once, and a token bucket refilled at
+    `tokens_per_minute` keeps the estimated token spend under the provider's
+    rate limit. Waiting jobs are served by priority class, then in arrival
+    order, so interactive clicks overtake scheduled posts and backfill.
+
+    When `max_queue_depth` jobs are already waiting, a new job either evicts
+    the lowest-priority waiter (if it outranks it) or is shed itself; shed jobs
+    raise `SchedulerSaturated`. Queue wait times are reported to `metrics`, if
+    given, as the `llm_wait` stage per priority class.
+
+    Usage:
+        async with scheduler.slot(Priority.INTERACTIVE, tokens=2000):
+            await chain.ainvoke(...)
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        tokens_per_minute: int | None = None,
+        max_queue_depth: int = 50,
+        metrics: StageMetrics | None = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.max_queue_depth = max_queue_depth
+        self.metrics = metrics
+
+        self._running = 0
+        self._queue: list[tuple[int, int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._tokens = float(tokens_per_minute or 0)
+        self._refilled_at = time.monotonic()
+        self._wakeup: asyncio.TimerHandle | None = None
+
+        self.completed = 0
+        self.shed = 0
+        self._wait_times: deque[float] = deque(maxlen=1000)
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority = Priority.INTERACTIVE, tokens: int = 0):
+        await self._acquire(priority, tokens)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def try_acquire(self, tokens: int = 0) -> bool:
+        """
+        Take a slot only if one is free right now, without queueing.
+
+        Never overtakes waiting jobs. Returns whether the slot was taken; a
+        taken slot must be given back with `release`.
+        """
+        if self.queue_depth() or not self._can_start(tokens):
+            return False
+        self._start(tokens)
+        return True
+
+    def release(self):
+        """Give back a slot taken with `try_acquire`."""
+        self._release()
+
+    def queue_depth(self, priority: Priority | None = None) -> int:
+        return sum(
+            1
+            for job_priority, _, _, future in self._queue
+            if not future.done() and (priority is None or job_priority == priority)
+        )
+
+    def stats(self) -> dict:
+        waits = sorted(self._wait_times)
+        return {
+            "running": self._running,
+            "queue_depth": {p.name.lower(): self.queue_depth(p) for p in Priority},
+            "completed": self.completed,
+            "shed": self.shed,
+            "wait_avg": sum(waits) / len(waits) if waits else 0.0,
+            "wait_p95": waits[int(len(waits) * 0.95)] if waits else 0.0,
+        }
+
+    async def _acquire(self, priority: Priority, tokens: int):
+        enqueued_at = time.monotonic()
+        if not self._queue and self._can_start(tokens):
+            self._start(tokens)
+            self._record_wait(priority, enqueued_at)
+            return
+
+        if self.queue_depth() >= self.max_queue_depth:
+            self._shed_for(priority)
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            self._queue, (int(priority), next(self._sequence), tokens, future)
+        )
+        # start it right away if possible, else make sure a token refill wakes it
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and not future.exception():
+                # the slot was granted just as the caller went away
+                self._release()
+            raise
+        self._record_wait(priority, enqueued_at)
+
+    def _shed_for(self, priority: Priority):
+        waiting = [job for job in self._queue if not job[3].done()]
+        # with a zero queue depth there is no waiter to evict
+        lowest = max(waiting, key=lambda job: (job[0], job[1]), default=None)
+        if lowest is None or lowest[0] <= priority:
+            self.shed += 1
+            raise SchedulerSaturated("LLM queue is full")
+
+        lowest[3].set_exception(SchedulerSaturated("Shed for higher-priority work"))
+        self.shed += 1
+
+    def _release(self):
+        self._running -= 1
+        self.completed += 1
+        self._dispatch()
+
+    def _dispatch(self):
+        while self._queue:
+            _, _, tokens, future = self._queue[0]
+            if future.done():
+                heapq.heappop(self._queue)
+                continue
+            if not self._can_start(tokens):
+                break
+            heapq.heappop(self._queue)
+            self._start(tokens)
+            future.set_result(None)
+
+        if self._queue and self._running < self.max_concurrency:
+            # blocked on the token budget; retry once enough tokens have refilled
+            self._schedule_wakeup(self._queue[0][2])
+
+    def _can_start(self, tokens: int) -> bool:
+        if self._running >= self.max_concurrency:
+            return False
+        if not self.tokens_per_minute:
+            return True
+        self._refill()
+        # a job larger than the whole budget waits for a full bucket
+        return self._tokens >= min(tokens, self.tokens_per_minute)
+
+    def _start(self, tokens: int):
+        self._running += 1
+        if self.tokens_per_minute:
+            self._tokens -= tokens
+
+    def _record_wait(self, priority: Priority, enqueued_at: float):
+        waited = time.monotonic() - enqueued_at
+        self._wait_times.append(waited)
+        if self.metrics is not None:
+            self.metrics.observe("llm_wait", priority.name.lower(), waited)
+
+    def _refill(self):
+        now = time.monotonic()
+        rate = self.tokens_per_minute / 60
+        self._tokens = min(
+            self.tokens_per_minute, self._tokens + (now - self._refilled_at) * rate
+        )
+        self._refilled_at = now
+
+    def _schedule_wakeup(self, tokens: int):
+        if self._wakeup is not None:
+            return
+        missing = min(tokens, self.tokens_per_minute) - self._tokens
+        delay = max(missing / (self.tokens_per_minute / 60), 0.05)
+        self._wakeup = asyncio.get_running_loop().call_later(delay, self._on_wakeup)
+
+    def _on_wakeup(self):
+        self._wakeup = None
+        self._dispatch()
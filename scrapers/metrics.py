@@ -0,0 +1,243 @@
+import bisect
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Callable
+import aiohttp
+from aiohttp import web
+
+# histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# recent samples kept per series for percentiles
+PERCENTILE_WINDOW = 1000
+METRIC_PREFIX = "comicbot"
+
+
+class _Series:
+    def __init__(self):
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+        self.recent: deque[float] = deque(maxlen=PERCENTILE_WINDOW)
+
+    def observe(self, seconds: float):
+        self.bucket_counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.recent.append(seconds)
+
+    def percentile(self, q: float) -> float:
+        if not self.recent:
+            return 0.0
+        samples = sorted(self.recent)
+        return samples[min(int(len(samples) * q), len(samples) - 1)]
+
+
+class StageMetrics:
+    """
+    Per-stage latency histograms, error counts and cache hit counters.
+
+    Series are labelled by stage (e.g. "page_fetch", "parse", "search", "llm",
+    "discord_send") and by source (the comic name, or the host for connection
+    stages). Everything lives in memory and is cheap to record, so it can be
+    used on every request. `render_prometheus` exposes the text format served
+    by `start_metrics_server`; `summary` feeds the /stats command.
+
+    Usage:
+        with metrics.time("parse", "xkcd"):
+            article, img_tag = await extract_image(html, "article", "post-content")
+    """
+
+    def __init__(self):
+        self._series: dict[tuple[str, str], _Series] = defaultdict(_Series)
+        self._cache_counts: dict[tuple[str, str, str], int] = defaultdict(int)
+        self._gauges: dict[str, Callable[[], float]] = {}
+        self._token_counts: dict[tuple[str, str], int] = defaultdict(int)
+
+    @contextmanager
+    def time(self, stage: str, source: str):
+        """Time the block; an exception escaping it counts as an error."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.error(stage, source)
+            raise
+        self.observe(stage, source, time.perf_counter() - started)
+
+    def observe(self, stage: str, source: str, seconds: float):
+        self._series[(stage, source)].observe(seconds)
+
+    def error(self, stage: str, source: str):
+        self._series[(stage, source)].errors += 1
+
+    def percentile(
+        self, stage: str, source: str, q: float, min_samples: int = 1
+    ) -> float | None:
+        """Recent `q` quantile of a series, or None with fewer than `min_samples`."""
+        series = self._series.get((stage, source))
+        if series is None or len(series.recent) < min_samples:
+            return None
+        return series.percentile(q)
+
+    def cache_lookup(self, cache: str, source: str, hit: bool):
+        self._cache_counts[(cache, source, "hit" if hit else "miss")] += 1
+
+    def count_tokens(self, source: str, input_tokens: int, output_tokens: int):
+        """Add the token usage the LLM reported for one call."""
+        self._token_counts[(source, "calls")] += 1
+        self._token_counts[(source, "input")] += input_tokens
+        self._token_counts[(source, "output")] += output_tokens
+
+    def add_gauge(self, name: str, fn: Callable[[], float]):
+        """Report `fn()` as gauge `name` whenever metrics are read."""
+        self._gauges[name] = fn
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """aiohttp tracing that records DNS and TCP+TLS connect time per host."""
+        trace_config = aiohttp.TraceConfig(trace_config_ctx_factory=SimpleNamespace)
+
+        async def on_request_start(session, ctx, params):
+            ctx.host = params.url.host or "unknown"
+
+        async def on_dns_start(session, ctx, params):
+            ctx.dns_started = time.perf_counter()
+
+        async def on_dns_end(session, ctx, params):
+            self.observe("dns", ctx.host, time.perf_counter() - ctx.dns_started)
+
+        async def on_connect_start(session, ctx, params):
+            ctx.connect_started = time.perf_counter()
+
+        async def on_connect_end(session, ctx, params):
+            self.observe("connect", ctx.host, time.perf_counter() - ctx.connect_started)
+
+        async def on_request_exception(session, ctx, params):
+            self.error("http", getattr(ctx, "host", "unknown"))
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_dns_resolvehost_start.append(on_dns_start)
+        trace_config.on_dns_resolvehost_end.append(on_dns_end)
+        trace_config.on_connection_create_start.append(on_connect_start)
+        trace_config.on_connection_create_end.append(on_connect_end)
+        trace_config.on_request_exception.append(on_request_exception)
+        return trace_config
+
+    def summary(self) -> dict:
+        stages = [
+            {
+                "stage": stage,
+                "source": source,
+                "count": series.count,
+                "errors": series.errors,
+                "p50": series.percentile(0.50),
+                "p95": series.percentile(0.95),
+                "p99": series.percentile(0.99),
+            }
+            for (stage, source), series in sorted(self._series.items())
+        ]
+
+        lookups = defaultdict(lambda: {"hits": 0, "misses": 0})
+        for (cache, source, result), count in self._cache_counts.items():
+            lookups[(cache, source)]["hits" if result == "hit" else "misses"] += count
+        caches = [
+            {
+                "cache": cache,
+                "source": source,
+                **counts,
+                "hit_ratio": counts["hits"] / (counts["hits"] + counts["misses"]),
+            }
+            for (cache, source), counts in sorted(lookups.items())
+        ]
+        sources = sorted({source for source, _ in self._token_counts})
+        tokens = [
+            {
+                "source": source,
+                "calls": self._token_counts[(source, "calls")],
+                "input": self._token_counts[(source, "input")],
+                "output": self._token_counts[(source, "output")],
+            }
+            for source in sources
+        ]
+        return {"stages": stages, "caches": caches, "tokens": tokens}
+
+    def render_prometheus(self) -> str:
+        duration = f"{METRIC_PREFIX}_stage_duration_seconds"
+        errors = f"{METRIC_PREFIX}_stage_errors_total"
+        cache = f"{METRIC_PREFIX}_cache_lookups_total"
+        tokens = f"{METRIC_PREFIX}_llm_tokens_total"
+        lines = [
+            f"# HELP {duration} Latency of each processing stage.",
+            f"# TYPE {duration} histogram",
+        ]
+        for (stage, source), series in sorted(self._series.items()):
+            labels = f'stage="{_escape(stage)}",source="{_escape(source)}"'
+            cumulative = 0
+            for bound, count in zip((*LATENCY_BUCKETS, "+Inf"), series.bucket_counts):
+                cumulative += count
+                lines.append(f'{duration}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{duration}_sum{{{labels}}} {series.total}")
+            lines.append(f"{duration}_count{{{labels}}} {series.count}")
+
+        lines += [
+            f"# HELP {errors} Failures of each processing stage.",
+            f"# TYPE {errors} counter",
+        ]
+        for (stage, source), series in sorted(self._series.items()):
+            lines.append(
+                f'{errors}{{stage="{_escape(stage)}",source="{_escape(source)}"}} '
+                f"{series.errors}"
+            )
+
+        lines += [
+            f"# HELP {cache} Cache lookups by result.",
+            f"# TYPE {cache} counter",
+        ]
+        for (name, source, result), count in sorted(self._cache_counts.items()):
+            lines.append(
+                f'{cache}{{cache="{_escape(name)}",source="{_escape(source)}",'
+                f'result="{result}"}} {count}'
+            )
+
+        lines += [
+            f"# HELP {tokens} LLM tokens reported by the model, and calls reporting them.",
+            f"# TYPE {tokens} counter",
+        ]
+        for (source, kind), count in sorted(self._token_counts.items()):
+            lines.append(
+                f'{tokens}{{source="{_escape(source)}",kind="{kind}"}} {count}'
+            )
+
+        for name, fn in sorted(self._gauges.items()):
+            gauge = f"{METRIC_PREFIX}_{name}"
+            lines += [f"# TYPE {gauge} gauge", f"{gauge} {fn()}"]
+        return "\n".join(lines) + "\n"
+
+
+async def start_metrics_server(
+    metrics: StageMetrics, host: str, port: int
+) -> web.AppRunner:
+    """
+    Serve `metrics` in the Prometheus text format at http://host:port/metrics.
+
+    The server runs on the calling event loop, so it must be started from
+    within the bot. The caller cleans up the returned runner on shutdown.
+    """
+
+    async def handle_metrics(request: web.Request) -> web.Response:
+        return web.Response(
+            text=metrics.render_prometheus(), content_type="text/plain", charset="utf-8"
+        )
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -1,16 +1,21 @@
 import aiohttp
 import asyncio
 import random
-from bs4 import BeautifulSoup
-from objects.comic_object import ComicData
+from objects.comic_object import CatalogEntry, ComicData
+from scrapers.html_extract import extract_image
 from scrapers.scraper import Scraper
 from urllib.parse import urljoin
 
+INDEX_URL = "https://www.monkeyuser.com/index.json"
+
 
 class MonkeyUserScraper(Scraper):
-    def __init__(self, config, logger=None):
+    def __init__(self, config, logger=None, **kwargs):
         super().__init__(
-            google_cse_id=config["MONKEYUSER_CSE_ID"], config=config, logger=logger
+            google_cse_id=config["MONKEYUSER_CSE_ID"],
+            config=config,
+            logger=logger,
+            **kwargs,
         )
 
     @property
@@ -24,21 +29,15 @@ class MonkeyUserScraper(Scraper):
     @property
     async def random_comic_url(self):
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    "https://www.monkeyuser.com/index.json"
-                ) as response:
-                    response.raise_for_status()
-
-                    json_data = await response.json()
-                    random_comic = random.choice(json_data)
+            json_data = (await self._get_cached(INDEX_URL)).json()
+            random_comic = random.choice(json_data)
 
-                    base_url = "https://www.monkeyuser.com"
-                    full_url = urljoin(base_url, random_comic["url"])
-                    return full_url
+            base_url = "https://www.monkeyuser.com"
+            full_url = urljoin(base_url, random_comic["url"])
+            return full_url
         except Exception as e:
             (
-                self.logger.error(f"monkeyuser.com: Error fetching random comic: {e}")
+                self.logger.error("monkeyuser.com: Error fetching random comic: %s", e)
                 if self.logger
                 else None
             )
@@ -48,75 +47,85 @@ class MonkeyUserScraper(Scraper):
     def latest_comic_url(self):
         return "https://www.monkeyuser.com/"
 
-    async def random_comic(self):
-        return await self._fetch_content(await self.random_comic_url)
+    async def _fetch_catalog_listing(
+        self, max_age: float | None = None
+    ) -> list[CatalogEntry]:
+        json_data = (await self._get_cached(INDEX_URL, max_age)).json()
+
+        # index.json lists the archive newest first
+        base_url = "https://www.monkeyuser.com"
+        return [
+            CatalogEntry(
+                slug=comic["url"],
+                url=urljoin(base_url, comic["url"]),
+                title=comic.get("title"),
+            )
+            for comic in json_data
+            if comic.get("url")
+        ]
 
     async def _fetch_content(self, url: str) -> ComicData | None:
-        async with aiohttp.ClientSession() as session:
-            try:
-                # fetch the raw HTML
-                async with session.get(url) as response:
-                    response.raise_for_status()  # Check for HTTP errors
-
-                    self.url = response.url
-                    html = await response.text()
-                    soup = BeautifulSoup(html, "lxml")
-                    # Return the second image URL (format: {'src': 'https://...', 'alt':'})
-                    content_div = soup.find("div", class_="content")
-                    if content_div:
-                        img_tag = content_div.find("img")
-                        if img_tag:
-                            base_url = "https://www.monkeyuser.com"
-                            self.src = urljoin(base_url, img_tag["src"])
-                            self.alt = img_tag["alt"]
-                            if self.src[-4:] == ".gif":
-                                random_url = urljoin(
-                                    base_url, soup.find(id="random-link")["href"]
-                                )
-                                return await self._fetch_content(random_url)
-
-                            comic_data = ComicData(
-                                title=img_tag["title"],
-                                description=self.alt,
-                                image_url=self.src,
-                                source_url=str(self.url),
-                                source_name=self.comic_name,
-                            )
-                            (
-                                self.logger.info(
-                                    f"monkeyuser.com: Fetched comic: {comic_data}"
-                                )
-                                if self.logger
-                                else None
-                            )
-                            return comic_data
-                        else:
-                            (
-                                self.logger.error(
-                                    "monkeyuser.com: Cannot find image tag."
-                                )
-                                if self.logger
-                                else None
-                            )
-                            return None
-                    else:
-                        (
-                            self.logger.error(
-                                "monkeyuser.com: Cannot find div tag with class 'content'."
-                            )
-                            if self.logger
-                            else None
+        try:
+            # fetch the raw HTML
+            with self.metrics.time("page_fetch", self.comic_name):
+                if url == self.latest_comic_url:
+                    cached = await self._get_cached(url)
+                    comic_url, html = cached.final_url, cached.body
+                else:
+                    async with self.session.get(url) as response:
+                        response.raise_for_status()  # Check for HTTP errors
+
+                        comic_url = str(response.url)
+                        html = await response.read()
+
+            with self.metrics.time("parse", self.comic_name):
+                content_div, img_tag = await extract_image(html, "div", "content")
+            # Return the second image URL (format: {'src': 'https://...', 'alt':'})
+            if content_div:
+                if img_tag:
+                    base_url = "https://www.monkeyuser.com"
+                    image_url = urljoin(base_url, img_tag["src"])
+                    alt_text = img_tag["alt"]
+                    comic_data = ComicData(
+                        title=img_tag["title"],
+                        description=alt_text,
+                        image_url=image_url,
+                        source_url=comic_url,
+                        source_name=self.comic_name,
+                    )
+                    (
+                        self.logger.info(
+                            "monkeyuser.com: Fetched comic: %s", comic_data
                         )
-                        return None
-
-            except aiohttp.ClientError as e:
+                        if self.logger
+                        else None
+                    )
+                    return comic_data
+                else:
+                    (
+                        self.logger.error("monkeyuser.com: Cannot find image tag.")
+                        if self.logger
+                        else None
+                    )
+                    return None
+            else:
                 (
-                    self.logger.error(f"monkeyuser.com: Error fetching URL: {e}")
+                    self.logger.error(
+                        "monkeyuser.com: Cannot find div tag with class 'content'."
+                    )
                     if self.logger
                     else None
                 )
                 return None
 
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            (
+                self.logger.error("monkeyuser.com: Error fetching URL: %s", e)
+                if self.logger
+                else None
+            )
+            return None
+
 
 # Run the async function
 if __name__ == "__main__":
@@ -124,6 +133,11 @@ if __name__ == "__main__":
 
     config = {**dotenv_values("../.env.secret"), **dotenv_values("../.env.public")}
     monkey_user_scraper = MonkeyUserScraper(config=config)
-    asyncio.run(monkey_user_scraper.search_comic("instructions"))
-    # asyncio.run(monkey_user_scraper.random_comic())
-    # asyncio.run(monkey_user_scraper.describe_comic())
+
+    async def run():
+        await monkey_user_scraper.search_comic("instructions")
+        # comic = await monkey_user_scraper.random_comic()
+        # await monkey_user_scraper.describe_comic(comic)
+        await monkey_user_scraper.close()
+
+    asyncio.run(run())
@@ -1,14 +1,58 @@
 import os
+import asyncio
+import hashlib
+import inspect
 import json
+import time
+import aiohttp
 from abc import ABC, abstractmethod
-from langchain_google_community import GoogleSearchAPIWrapper
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
-from langchain_community.tools import DuckDuckGoSearchResults
-from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
-from langchain_groq import ChatGroq
-from ddgs.exceptions import DDGSException
-from objects.comic_object import ComicAnalysis, ComicData
+from typing import Awaitable, Callable
+from objects.comic_object import CatalogEntry, ComicAnalysis, ComicData
+from scrapers.comic_catalog import ComicCatalog
+from scrapers.comic_history import ComicHistory
+from scrapers.explanation_cache import ExplanationCache
+from scrapers.http_cache import CachedResponse, HttpCache
+from scrapers.image_store import ImageStore, fingerprint_image
+from scrapers.http_session import create_http_session
+from scrapers.llm_scheduler import LLMScheduler, Priority, SchedulerSaturated
+from scrapers.metrics import StageMetrics
+from scrapers.search_cache import SearchResultCache
+from scrapers.search_backends import SearchBackend, create_search_backend
+from scrapers.search_index import SearchIndex
+from scrapers.single_flight import SingleFlight
+from scrapers.sqlite_store import normalize_url
+
+# how many catalog entries without details are fetched per catalog refresh
+CATALOG_DETAIL_BATCH = 50
+CATALOG_DETAIL_CONCURRENCY = 4
+# bounded retry budget for skipping animated comics during random selection
+MAX_RANDOM_ATTEMPTS = 3
+# retry budget when preparing a scheduled post ahead of time
+PREPARE_ATTEMPTS = 3
+PREPARE_RETRY_DELAY = 60  # seconds
+# most releases announced per check, e.g. after the bot was down for a while
+MAX_RELEASES_PER_CHECK = 3
+# checks a new release waits for its explanation before it is posted without one
+RELEASE_EXPLAIN_ATTEMPTS = 6
+# rough prompt + image + completion tokens of one explanation, for rate budgeting
+ESTIMATED_TOKENS_PER_DESCRIPTION = 2000
+# of which the system prompt and format instructions, sent once per request
+ESTIMATED_PROMPT_TOKENS = 500
+# most comics packed into one batched LLM request (Groq accepts up to 5 images)
+MAX_BATCH_SIZE = 5
+# completion budget of one analysis; a batch gets this much per comic
+MAX_TOKENS_PER_ANALYSIS = 512
+# the vision model a slow request is hedged with, for LLM_HEDGE_MODEL="auto"
+ALTERNATE_MODELS = {
+    "meta-llama/llama-4-scout-17b-16e-instruct": "meta-llama/llama-4-maverick-17b-128e-instruct",
+    "meta-llama/llama-4-maverick-17b-128e-instruct": "meta-llama/llama-4-scout-17b-16e-instruct",
+}
+# the hedge is sent once the primary model takes longer than this quantile of
+# recent first-token latencies, once that many have been seen
+HEDGE_QUANTILE = 0.95
+HEDGE_MIN_SAMPLES = 20
+
+PartialCallback = Callable[[dict], Awaitable[None]]
 
 
 class Scraper(ABC):
@@ -18,25 +62,148 @@ class Scraper(ABC):
     This abstract class defines the structure and methods required for creating a comic
     scraper. Subclasses should provide implementations for abstract properties and methods
     and can leverage the provided utilities for fetching and describing comics.
+
+    A scraper picks comics from a local `ComicCatalog` of its source, fetches
+    them through a pooled HTTP session, explains them with the vision LLM and
+    finds them with `search_comic`. The session, `ExplanationCache`,
+    `LLMScheduler` and `StageMetrics` are shared with the bot when given; the
+    catalog, post history, HTTP cache, search index and image store live under
+    `CACHE_DIR`.
     """
 
-    def __init__(self, google_cse_id: str, config: dict, logger=None):
-        self.src = None
-        self.alt = None
-        self.url = None
+    def __init__(
+        self,
+        google_cse_id: str,
+        config: dict,
+        logger=None,
+        session: aiohttp.ClientSession | None = None,
+        explanation_cache: ExplanationCache | None = None,
+        llm_scheduler: LLMScheduler | None = None,
+        metrics: StageMetrics | None = None,
+    ):
         self.google_cse_id = google_cse_id
         self.config = config
         self.logger = logger
+        self._session = session
+        self._owns_session = False
+        self.explanation_cache = explanation_cache
+        self.llm_scheduler = llm_scheduler
+        self.metrics = metrics if metrics is not None else StageMetrics()
+        self._single_flight = SingleFlight()
+        # describe_comic key -> callbacks streaming that explanation
+        self._partial_listeners: dict[tuple, list[PartialCallback]] = {}
+        self._search_backends: dict[str, SearchBackend | None] = {}
+        search_ttl_hours = float(config.get("SEARCH_CACHE_TTL_HOURS", 24))
+        negative_ttl_minutes = float(
+            config.get("SEARCH_CACHE_NEGATIVE_TTL_MINUTES", 15)
+        )
+        self.search_cache = SearchResultCache(
+            ttl=search_ttl_hours * 3600, negative_ttl=negative_ttl_minutes * 60
+        )
+        self.catalog = ComicCatalog(
+            path=os.path.join(config.get("CACHE_DIR", "cache"), "catalog.db"),
+            source=self.comic_name,
+        )
+        self.search_index = SearchIndex(
+            path=os.path.join(config.get("CACHE_DIR", "cache"), "search.db")
+        )
+        self.history = ComicHistory(
+            path=os.path.join(config.get("CACHE_DIR", "cache"), "history.db"),
+            source=self.comic_name,
+            post_ttl=float(config.get("POST_HISTORY_DAYS", 180)) * 86400,
+        )
+        self.http_cache = HttpCache(
+            path=os.path.join(config.get("CACHE_DIR", "cache"), "http.db")
+        )
+        self.http_cache_fresh = float(config.get("HTTP_CACHE_FRESH_SECONDS", 60))
+        self.http_cache_stale = float(config.get("HTTP_CACHE_STALE_SECONDS", 3600))
+        self._background_tasks: set[asyncio.Task] = set()
+        # new release URL -> failed explanations so far
+        self._release_explain_failures: dict[str, int] = {}
+        image_max_side = int(config.get("IMAGE_MAX_SIDE", 1008))
+        self.image_store = (
+            ImageStore(
+                directory=os.path.join(config.get("CACHE_DIR", "cache"), "images"),
+                max_side=image_max_side,
+                quality=int(config.get("IMAGE_JPEG_QUALITY", 85)),
+            )
+            if image_max_side > 0
+            else None
+        )
+        self.llm_timeout = float(config.get("LLM_TIMEOUT_SECONDS", 60))
+        self.llm_hedge_model = config.get("LLM_HEDGE_MODEL", "auto")
+        self.llm_hedge_min_delay = float(config.get("LLM_HEDGE_MIN_DELAY_SECONDS", 2))
         if logger is None:
             print("No logger provided.")
-        self.llm = ChatGroq(
-            model=os.getenv("IMAGE_LLM"),
+        self._llm = None
+        self._alternate_llm = None
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            self._llm = self._create_llm(os.getenv("IMAGE_LLM"))
+        return self._llm
+
+    @llm.setter
+    def llm(self, llm):
+        self._llm = llm
+
+    @property
+    def alternate_llm(self):
+        """The model slow `llm` calls are hedged with, or None to not hedge."""
+        if self._alternate_llm is None:
+            model = self.llm_hedge_model
+            if model == "auto":
+                model = ALTERNATE_MODELS.get(self.llm.model_name)
+            if not model or model == self.llm.model_name:
+                return None
+            self._alternate_llm = self._create_llm(model)
+        return self._alternate_llm
+
+    @alternate_llm.setter
+    def alternate_llm(self, llm):
+        self._alternate_llm = llm
+
+    def _create_llm(self, model: str):
+        # the Groq client and langchain are slow to import, so they are only
+        # loaded when the first comic is explained
+        from langchain_groq import ChatGroq
+
+        return ChatGroq(
+            model=model,
             temperature=1,
-            max_tokens=512,
-            timeout=None,
+            max_tokens=MAX_TOKENS_PER_ANALYSIS,
+            timeout=self.llm_timeout,
             max_retries=2,
         )
 
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        The HTTP session all requests go through.
+
+        The bot normally passes in one session shared by every scraper; without
+        one (e.g. running a scraper standalone), the scraper creates its own
+        on first use and closes it in `close()`.
+        """
+        if self._session is None or self._session.closed:
+            self._session = create_http_session(
+                trace_configs=[self.metrics.trace_config()]
+            )
+            self._owns_session = True
+        return self._session
+
+    async def close(self):
+        for task in self._background_tasks:
+            task.cancel()
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        self.http_cache.close()
+        self.history.close()
+        self.catalog.close()
+        self.search_index.close()
+        if self._owns_session and self._session and not self._session.closed:
+            await self._session.close()
+
     @property
     @abstractmethod
     def comic_name(self):
@@ -61,53 +228,782 @@ class Scraper(ABC):
     async def _fetch_content(self, comic_url: str) -> ComicData | None:
         pass
 
-    async def random_comic(self):
-        return await self._fetch_content(self.random_comic_url)
+    @abstractmethod
+    async def _fetch_catalog_listing(
+        self, max_age: float | None = None
+    ) -> list[CatalogEntry]:
+        """
+        List the upstream archive, newest first, for merging into the catalog.
+
+        `max_age` is passed on to `_get_cached` for the index it is read from.
+        """
+        pass
+
+    async def _fetch_release_listing(self) -> list[CatalogEntry]:
+        """
+        List at least the most recent comics, newest first, for the release watcher.
+
+        Called every few minutes, so it always revalidates the index but costs
+        a 304 when nothing was released.
+        """
+        return await self._fetch_catalog_listing(max_age=0)
+
+    async def random_comic(self, skip_posted: bool = False):
+        """
+        A random non-animated comic, picked from the catalog without network
+        access when it is populated. With `skip_posted`, comics posted within
+        `POST_HISTORY_DAYS` are skipped.
+        """
+        # comics whose details are not in the catalog yet may turn out to be
+        # animated once fetched; they get flagged and are never sampled again
+        for _ in range(MAX_RANDOM_ATTEMPTS):
+            comic = await self._random_candidate()
+            if comic is None or comic.is_animated:
+                continue
+            if skip_posted and await self.was_posted(comic):
+                continue
+            return comic
+
+        (
+            self.logger.error("%s: No usable random comic found.", self.comic_name)
+            if self.logger
+            else None
+        )
+        return None
+
+    async def _random_candidate(self) -> ComicData | None:
+        entry = self.catalog.random_entry()
+        self.metrics.cache_lookup("catalog", self.comic_name, entry is not None)
+        if entry is not None:
+            return await self.comic_from_entry(entry)
+
+        # the catalog is not populated yet, ask the upstream site instead
+        url = self.random_comic_url
+        if inspect.isawaitable(url):
+            url = await url
+        if not url:
+            return None
+        comic = await self._fetch_content(url)
+        if comic is not None:
+            await self._remember(comic)
+        return comic
 
     async def latest_comic(self):
-        return await self._fetch_content(self.latest_comic_url)
+        entry = self.catalog.latest_entry()
+        self.metrics.cache_lookup("catalog", self.comic_name, entry is not None)
+        if entry is not None:
+            comic = await self.comic_from_entry(entry)
+        else:
+            comic = await self._fetch(self.latest_comic_url)
+        return await self._skip_animated(comic)
 
-    async def search_comic(self, query: str):
-        link = None
-        search_engine = os.getenv("SEARCH_ENGINE")
-        if search_engine == "google":
-            wrapper = GoogleSearchAPIWrapper(google_cse_id=self.google_cse_id)
-            # k=1 ensures we just get the top result
-            results = wrapper.results(query, num_results=1)
-            if results:
-                link = results[0].get("link")
+    async def _skip_animated(self, comic: ComicData | None) -> ComicData | None:
+        if comic is not None and comic.is_animated:
+            # animated comics cannot be explained, offer a random one instead
+            return await self.random_comic()
+        return comic
+
+    async def prepare_comic(
+        self, attempts: int = PREPARE_ATTEMPTS, retry_delay: float = PREPARE_RETRY_DELAY
+    ) -> ComicData | None:
+        """
+        Pick a random comic and explain it ahead of time, retrying on failure.
+
+        The explanation ends up in the explanation cache, so describing the
+        returned comic again is instant.
+        """
+        for attempt in range(1, attempts + 1):
+            comic = await self.random_comic(skip_posted=True)
+            if comic is not None:
+                analysis = await self.describe_comic(comic, Priority.SCHEDULED)
+                if analysis.get("Core_concept") != "Error":
+                    return comic
+
+            (
+                self.logger.warning(
+                    "%s: Failed to prepare a comic (attempt %s/%s)",
+                    self.comic_name,
+                    attempt,
+                    attempts,
+                )
+                if self.logger
+                else None
+            )
+            if attempt < attempts:
+                await asyncio.sleep(retry_delay)
+        return None
+
+    async def list_archive(self) -> list[CatalogEntry]:
+        """
+        Every comic of the source, newest first.
+
+        The upstream listing is merged into the catalog first; entries may lack
+        details until the comic is fetched (see `comic_from_entry`).
+        """
+        await self.catalog.merge(await self._fetch_catalog_listing())
+        return self.catalog.entries()
+
+    async def comic_from_entry(self, entry: CatalogEntry) -> ComicData | None:
+        """
+        The comic of a catalog entry, fetched only when the catalog lacks its
+        details. Returns None if the fetch fails.
+        """
+        if entry.is_complete():
+            return entry.to_comic_data(self.comic_name)
+        return await self._fetch(entry.url)
+
+    async def is_explained(self, entry: CatalogEntry) -> bool:
+        """Whether the comic's explanation is cached, checked without network access."""
+        if self.explanation_cache is None or entry.image_url is None:
+            return False
+        digest = await self.explanation_cache.get_image_digest(entry.image_url)
+        if digest is None:
+            return False
+        return await self.explanation_cache.contains(digest, self.llm.model_name)
 
-        elif search_engine == "duckduckgo":
-            wrapper = DuckDuckGoSearchAPIWrapper(
-                region="us-en", source="text", safesearch="off", max_results=3
+    async def check_new_releases(self) -> list[ComicData]:
+        """
+        Return the comics released since the last check, oldest first.
+
+        The first check only records the current newest comic. When the last
+        seen comic is no longer in the listing, only the newest is returned.
+        The release marker only moves on with `mark_released`, once a comic
+        has been posted, so releases that could not be posted are returned
+        again by the next check.
+        """
+        try:
+            listing = await self._fetch_release_listing()
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            (
+                self.logger.error(
+                    "%s: Error checking for new releases: %s", self.comic_name, e
+                )
+                if self.logger
+                else None
             )
-            search = DuckDuckGoSearchResults(
-                api_wrapper=wrapper, output_format="json", num_results=1
+            return []
+        if not listing:
+            return []
+
+        marker = self.catalog.release_marker()
+        if marker is None:
+            await self.catalog.set_release_marker(listing[0].slug)
+            return []
+        slugs = [entry.slug for entry in listing]
+        if marker not in slugs:
+            released = listing[:1]
+        else:
+            released = listing[: slugs.index(marker)][:MAX_RELEASES_PER_CHECK]
+        if not released:
+            return []
+
+        await self.catalog.merge(listing)
+        comics = []
+        for entry in reversed(released):
+            comic = await self.comic_from_entry(self.catalog.get(entry.slug))
+            if comic is None:
+                # retried next check; later releases wait, so none is skipped
+                break
+            if not comic.is_animated:
+                comics.append(comic)
+            elif not comics:
+                # never posted, so nothing to wait for
+                await self.catalog.set_release_marker(entry.slug)
+        (
+            self.logger.info(
+                "%s: %s new release(s): %s",
+                self.comic_name,
+                len(comics),
+                [comic.source_url for comic in comics],
             )
+            if self.logger
+            else None
+        )
+        return comics
+
+    async def mark_released(self, comic: ComicData):
+        """Move the release marker past `comic`, once it is posted (or skipped)."""
+        entry = self.catalog.get_by_url(comic.source_url)
+        if entry is not None:
+            await self.catalog.set_release_marker(entry.slug)
+        self._release_explain_failures.pop(comic.source_url, None)
 
+    def release_explanation_failed(self, comic: ComicData) -> bool:
+        """
+        Count a failed explanation of a new release.
+
+        Returns True once it has failed `RELEASE_EXPLAIN_ATTEMPTS` times, when
+        the release should be posted without an explanation rather than held
+        back any longer.
+        """
+        failures = self._release_explain_failures.get(comic.source_url, 0) + 1
+        self._release_explain_failures[comic.source_url] = failures
+        return failures >= RELEASE_EXPLAIN_ATTEMPTS
+
+    async def was_posted(self, comic: ComicData) -> bool:
+        """
+        Whether the comic, or a copy of its image, was posted recently.
+
+        Only local state is consulted: the post history and the remembered
+        image digests, so no image is downloaded.
+        """
+        digest = None
+        if self.explanation_cache is not None:
+            digest = await self.explanation_cache.get_image_digest(comic.image_url)
+        return self.history.was_posted(comic.source_url, digest)
+
+    async def record_post(self, comic: ComicData):
+        digest = await self._image_digest(comic.image_url)
+        await self.history.record_post(comic.source_url, digest)
+
+    async def refresh_catalog(self) -> list[CatalogEntry]:
+        """
+        Merge the upstream archive listing into the local catalog, then fetch the
+        details of a bounded batch of comics the catalog knows nothing else about.
+
+        Returns the comics that were new to the catalog.
+        """
+        try:
+            listing = await self._fetch_catalog_listing()
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            (
+                self.logger.error(
+                    "%s: Error refreshing catalog: %s", self.comic_name, e
+                )
+                if self.logger
+                else None
+            )
+            return []
+
+        new_entries = await self.catalog.merge(listing)
+        await self.search_index.add_many(
+            [
+                (self.comic_name, e.url, {"title": e.title, "alt_text": e.alt_text})
+                for e in listing
+                if e.title or e.alt_text
+            ]
+        )
+
+        semaphore = asyncio.Semaphore(CATALOG_DETAIL_CONCURRENCY)
+
+        async def fill(entry: CatalogEntry):
+            async with semaphore:
+                await self.comic_from_entry(entry)
+
+        await asyncio.gather(
+            *(fill(e) for e in self.catalog.incomplete_entries(CATALOG_DETAIL_BATCH))
+        )
+        (
+            self.logger.info(
+                "%s: Catalog refreshed, %s new, %s total",
+                self.comic_name,
+                len(new_entries),
+                len(self.catalog),
+            )
+            if self.logger
+            else None
+        )
+        return new_entries
+
+    async def _fetch(self, url: str) -> ComicData | None:
+        # share one in-flight fetch between concurrent requests for the same
+        # URL, with or without a trailing slash
+        comic = await self._single_flight.do(
+            ("fetch", normalize_url(url)), lambda: self._fetch_content(url)
+        )
+        if comic is not None:
+            await self._remember(comic)
+        return comic
+
+    async def _remember(self, comic: ComicData):
+        # record details (including the animated flag) in the catalog and index
+        await self.catalog.record(comic)
+        await self.search_index.add(
+            self.comic_name,
+            comic.source_url,
+            title=comic.title,
+            alt_text=comic.description,
+            transcript=comic.transcript,
+        )
+
+    async def _get_cached(
+        self, url: str, max_age: float | None = None
+    ) -> CachedResponse:
+        """
+        GET `url` through the HTTP cache (stale-while-revalidate).
+
+        With `max_age`, copies older than that are revalidated before they are
+        returned instead of in the background. Raises `aiohttp.ClientError` or
+        `asyncio.TimeoutError` only when the upstream fails and there is no
+        cached copy to fall back on.
+        """
+        cached = await self.http_cache.get(url)
+        age = cached.age() if cached is not None else None
+        fresh = self.http_cache_fresh if max_age is None else max_age
+        self.metrics.cache_lookup(
+            "http_cache", self.comic_name, age is not None and age < fresh
+        )
+        if age is not None and age < fresh:
+            return cached
+        if (
+            max_age is None
+            and age is not None
+            and age < self.http_cache_fresh + self.http_cache_stale
+        ):
+            self._revalidate_in_background(url, cached)
+            return cached
+        return await self._single_flight.do(
+            ("revalidate", url), lambda: self._revalidate(url, cached)
+        )
+
+    def _revalidate_in_background(self, url: str, cached: CachedResponse):
+        async def revalidate():
             try:
-                results = json.loads(
-                    await search.ainvoke(f"{query} site:{self.search_domain}")
+                await self._single_flight.do(
+                    ("revalidate", url), lambda: self._revalidate(url, cached)
                 )
-                if results:
-                    link = results[0]["link"]
-            except DDGSException:
+            except Exception as e:
                 (
-                    self.logger.info(
-                        f"Search for {query}: No results found in {self.comic_name}"
+                    self.logger.error(
+                        "%s: Error revalidating %s: %s", self.comic_name, url, e
                     )
                     if self.logger
                     else None
                 )
+
+        task = asyncio.create_task(revalidate())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _revalidate(
+        self, url: str, cached: CachedResponse | None
+    ) -> CachedResponse:
+        headers = {}
+        if cached is not None and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached is not None and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+        try:
+            async with self.session.get(url, headers=headers) as response:
+                if response.status == 304 and cached is not None:
+                    cached.fetched_at = time.time()
+                    await self.http_cache.touch(url, cached.fetched_at)
+                    return cached
+
+                response.raise_for_status()
+                fetched = CachedResponse(
+                    url=url,
+                    final_url=str(response.url),
+                    body=await response.read(),
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                    fetched_at=time.time(),
+                )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if cached is None:
+                raise
+            # the upstream is down, keep serving the last good copy
+            (
+                self.logger.warning(
+                    "%s: Serving cached %s (%.0fs old), upstream failed: %s",
+                    self.comic_name,
+                    url,
+                    cached.age(),
+                    e,
+                )
+                if self.logger
+                else None
+            )
+            return cached
+
+        await self.http_cache.set(fetched)
+        return fetched
+
+    async def _comic_from_url(self, url: str) -> ComicData | None:
+        entry = self.catalog.get_by_url(url)
+        if entry is not None:
+            return await self.comic_from_entry(entry)
+        return await self._fetch(url)
+
+    async def search_comic(self, query: str):
+        """
+        The URL of the comic best matching `query`, from the local `SearchIndex`
+        first and from a web search of the source's domain on a miss. Web
+        results, empty ones included, are cached per query, domain and engine.
+        """
+        local_results = await self.search_index.search(self.comic_name, query)
+        self.metrics.cache_lookup("search_index", self.comic_name, bool(local_results))
+        if local_results:
+            (
+                self.logger.info(
+                    "Search for %s: Found %s in local index", query, local_results[0]
+                )
+                if self.logger
+                else None
+            )
+            return await self._skip_animated(
+                await self._comic_from_url(local_results[0])
+            )
+
+        engine = os.getenv("SEARCH_ENGINE")
+        cache_key = self.search_cache.make_key(query, self.search_domain, engine)
+        found, comic_url = self.search_cache.get(cache_key)
+        self.metrics.cache_lookup("search_cache", self.comic_name, found)
+        if found:
+            (
+                self.logger.info("Search for %s: Cached result %s", query, comic_url)
+                if self.logger
+                else None
+            )
+            if comic_url is None:
                 return None
+            return await self._skip_animated(await self._comic_from_url(comic_url))
 
+        comic = None
+        backend = self._search_backend(engine)
+        link = None
+        if backend:
+            with self.metrics.time("search", self.comic_name):
+                link = await backend.search(query, self.search_domain)
         if link:
-            return await self._fetch_content(link)
-        return None
+            comic = await self._fetch(link)
+
+        # remember the resolved comic, or that the engine found nothing; a failed
+        # fetch of a found link is not cached
+        if comic is not None or not link:
+            self.search_cache.set(cache_key, comic.source_url if comic else None)
+
+        if comic is None:
+            (
+                self.logger.info(
+                    "Search for %s: No results found in %s", query, self.comic_name
+                )
+                if self.logger
+                else None
+            )
+        return await self._skip_animated(comic)
+
+    def _search_backend(self, engine: str) -> SearchBackend | None:
+        # built once per engine, since the engine can be switched at runtime
+        if engine not in self._search_backends:
+            self._search_backends[engine] = create_search_backend(
+                engine, self.google_cse_id
+            )
+        return self._search_backends[engine]
+
+    async def describe_comic(
+        self,
+        comic: ComicData,
+        priority: Priority = Priority.INTERACTIVE,
+        on_partial: PartialCallback | None = None,
+    ):
+        """
+        Explain a comic with the vision LLM.
+
+        Explanations are cached per image and model, and concurrent requests
+        for the same comic share one LLM call. The call waits for a slot of
+        the `LLMScheduler` at `priority`, has a hard timeout, and is hedged
+        when interactive (see `_hedged_stream`).
 
-    async def describe_comic(self):
-        image_url = self.src
-        alt_text_info = f"Alt text: {self.alt}"
+        If `on_partial` is given, it is awaited with the partially parsed
+        analysis each time more of it has streamed in, so callers can show the
+        explanation as it is written. Callers joining an explanation already in
+        progress receive the rest of its stream too.
+        """
+        key = ("describe", comic.source_url, comic.image_url, self.llm.model_name)
+        listeners = self._partial_listeners.setdefault(key, [])
+        if on_partial is not None:
+            listeners.append(on_partial)
+        try:
+            return await self._single_flight.do(
+                key, lambda: self._describe_comic(comic, priority, key)
+            )
+        finally:
+            if on_partial is not None:
+                listeners.remove(on_partial)
+            if not listeners and self._partial_listeners.get(key) is listeners:
+                del self._partial_listeners[key]
+
+    async def describe_comics(
+        self,
+        comics: list[ComicData],
+        priority: Priority = Priority.BACKFILL,
+        batch_size: int = MAX_BATCH_SIZE,
+    ) -> list[dict]:
+        """
+        Explain several comics, packing up to `batch_size` into each LLM request.
+
+        The system prompt and format instructions are sent once per request
+        instead of once per comic, so bulk runs fit more comics into the same
+        token budget. Cached explanations are reused and comics sharing an
+        image are explained once. A batch answer that is not a JSON array of
+        valid analyses, one per comic, is split back up and those comics are
+        retried one at a time with `describe_comic`.
+
+        Returns one analysis per comic, in the order of `comics`.
+        """
+        batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        model = self.llm.model_name
+        results: list[dict | None] = [None] * len(comics)
+        # image hash -> indexes of the comics showing that image
+        pending: dict[str, list[int]] = {}
+        digests = await asyncio.gather(
+            *(self._image_digest(comic.image_url) for comic in comics)
+        )
+        for index, image_hash in enumerate(digests):
+            if self.explanation_cache is not None:
+                cached = await self.explanation_cache.get(image_hash, model)
+                self.metrics.cache_lookup(
+                    "explanation_cache", self.comic_name, cached is not None
+                )
+                if cached is not None:
+                    results[index] = cached
+                    await self._index_explanation(comics[index], cached)
+                    continue
+            pending.setdefault(image_hash, []).append(index)
+
+        async def retry_alone(index: int) -> dict:
+            return await self.describe_comic(comics[index], priority)
+
+        async def describe_batch(batch: list[tuple[str, list[int]]]):
+            if len(batch) == 1:
+                analyses = [None]
+            else:
+                analyses = await self._scheduled_batch_description(
+                    [comics[indexes[0]] for _, indexes in batch], priority
+                )
+            retries = []
+            for (image_hash, indexes), analysis in zip(batch, analyses):
+                if analysis is None:
+                    retries.append(indexes)
+                    continue
+                comic = comics[indexes[0]]
+                if self.explanation_cache is not None:
+                    await self.explanation_cache.set(
+                        comic.source_url, image_hash, model, analysis
+                    )
+                for index in indexes:
+                    results[index] = analysis
+                    await self._index_explanation(comics[index], analysis)
+
+            retried = await asyncio.gather(
+                *(retry_alone(indexes[0]) for indexes in retries)
+            )
+            for indexes, analysis in zip(retries, retried):
+                for index in indexes:
+                    results[index] = analysis
+
+        groups = list(pending.items())
+        await asyncio.gather(
+            *(
+                describe_batch(groups[start : start + batch_size])
+                for start in range(0, len(groups), batch_size)
+            )
+        )
+        return results
+
+    async def _describe_comic(self, comic: ComicData, priority: Priority, key: tuple):
+        result = await self._cached_description(comic, priority, key)
+        await self._index_explanation(comic, result)
+        return result
+
+    async def _index_explanation(self, comic: ComicData, result: dict):
+        if result.get("Core_concept") != "Error":
+            await self.search_index.add(
+                self.comic_name,
+                comic.source_url,
+                explanation=" ".join(str(value) for value in result.values()),
+            )
+
+    async def _cached_description(
+        self, comic: ComicData, priority: Priority, key: tuple
+    ):
+        if self.explanation_cache is None:
+            return await self._scheduled_description(comic, priority, key)
+
+        model = self.llm.model_name
+        # comics showing the same image share one explanation
+        image_hash = await self._image_digest(comic.image_url)
+        cached = await self.explanation_cache.get(image_hash, model)
+        self.metrics.cache_lookup(
+            "explanation_cache", self.comic_name, cached is not None
+        )
+        if cached is not None:
+            (
+                self.logger.info(
+                    "%s: Explanation cache hit for %s",
+                    self.comic_name,
+                    comic.source_url,
+                )
+                if self.logger
+                else None
+            )
+            return cached
+
+        # and one LLM call, even when requested under different URLs at once
+        result = await self._single_flight.do(
+            ("describe_image", image_hash, model),
+            lambda: self._scheduled_description(comic, priority, key),
+        )
+        if result.get("Core_concept") != "Error":
+            await self.explanation_cache.set(
+                comic.source_url, image_hash, model, result
+            )
+        return result
+
+    async def _scheduled_description(
+        self, comic: ComicData, priority: Priority, key: tuple
+    ):
+        # only worth the extra tokens when someone is waiting for the answer
+        hedge = priority == Priority.INTERACTIVE
+        if self.llm_scheduler is None:
+            return await self._generate_description(comic, key, hedge)
+
+        try:
+            async with self.llm_scheduler.slot(
+                priority, tokens=ESTIMATED_TOKENS_PER_DESCRIPTION
+            ):
+                return await self._generate_description(comic, key, hedge)
+        except SchedulerSaturated as e:
+            (
+                self.logger.warning("%s: LLM job shed: %s", self.comic_name, e)
+                if self.logger
+                else None
+            )
+            return {
+                "Core_concept": "Error",
+                "Explanation": "The explainer is busy, please try again later.",
+            }
+
+    async def _scheduled_batch_description(
+        self, comics: list[ComicData], priority: Priority
+    ) -> list[dict | None]:
+        if self.llm_scheduler is None:
+            return await self._generate_batch_description(comics)
+
+        # the prompt is only paid for once
+        tokens = ESTIMATED_PROMPT_TOKENS + len(comics) * (
+            ESTIMATED_TOKENS_PER_DESCRIPTION - ESTIMATED_PROMPT_TOKENS
+        )
+        try:
+            async with self.llm_scheduler.slot(priority, tokens=tokens):
+                return await self._generate_batch_description(comics)
+        except SchedulerSaturated as e:
+            (
+                self.logger.warning("%s: LLM batch shed: %s", self.comic_name, e)
+                if self.logger
+                else None
+            )
+            return [None] * len(comics)
+
+    async def _image_digest(self, image_url: str) -> str:
+        """SHA-256 of the comic image, downloaded once and remembered in the cache."""
+        if self.explanation_cache is not None:
+            digest = await self.explanation_cache.get_image_digest(image_url)
+            if digest is not None:
+                return digest
+
+        image = await self._single_flight.do(
+            ("image", image_url), lambda: self._fetch_image(image_url)
+        )
+        if image is None:
+            # fall back to the URL so the comic can still be cached
+            return hashlib.sha256(image_url.encode("utf-8")).hexdigest()
+        return image[0]
+
+    async def _image_for_llm(self, image_url: str) -> str:
+        """The prepared image as an inline data URL, or `image_url` as a fallback."""
+        if self.image_store is None:
+            return image_url
+
+        prepared = None
+        if self.explanation_cache is not None:
+            digest = await self.explanation_cache.get_image_digest(image_url)
+            if digest is not None:
+                prepared = await self.image_store.get(digest)
+        if prepared is None:
+            image = await self._single_flight.do(
+                ("image", image_url), lambda: self._fetch_image(image_url)
+            )
+            prepared = image[1] if image is not None else None
+        if prepared is None:
+            return image_url
+        return self.image_store.data_url(prepared)
+
+    async def _fetch_image(self, image_url: str) -> tuple[str, bytes | None] | None:
+        """
+        Download a comic image, remember its digest and fingerprint, and store
+        its prepared copy.
+
+        Returns the digest and the prepared image (None without an image store
+        or when the image cannot be processed), or None if the download failed.
+        """
+        try:
+            with self.metrics.time("image_fetch", self.comic_name):
+                async with self.session.get(image_url) as response:
+                    response.raise_for_status()
+                    original = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            (
+                self.logger.error("%s: Error fetching image: %s", self.comic_name, e)
+                if self.logger
+                else None
+            )
+            return None
+
+        digest = hashlib.sha256(original).hexdigest()
+        if self.explanation_cache is not None:
+            await self.explanation_cache.set_image_digest(image_url, digest)
+        try:
+            fingerprint = await asyncio.to_thread(fingerprint_image, original)
+            canonical = await self.history.add_image(digest, fingerprint)
+        except Exception as e:
+            (
+                self.logger.error(
+                    "%s: Error fingerprinting image %s: %s",
+                    self.comic_name,
+                    image_url,
+                    e,
+                )
+                if self.logger
+                else None
+            )
+        else:
+            if canonical != digest:
+                (
+                    self.logger.info(
+                        "%s: %s is a copy of a known image", self.comic_name, image_url
+                    )
+                    if self.logger
+                    else None
+                )
+        if self.image_store is None:
+            return digest, None
+
+        try:
+            with self.metrics.time("image_prepare", self.comic_name):
+                prepared = await self.image_store.put(digest, original)
+        except Exception as e:
+            (
+                self.logger.error(
+                    "%s: Error preparing image %s: %s", self.comic_name, image_url, e
+                )
+                if self.logger
+                else None
+            )
+            return digest, None
+        return digest, prepared
+
+    async def _generate_description(
+        self, comic: ComicData, key: tuple, hedge: bool = True
+    ):
+        from langchain_core.callbacks import UsageMetadataCallbackHandler
+        from langchain_core.prompts import ChatPromptTemplate
+        from langchain_core.output_parsers import JsonOutputParser
+
+        image_url = await self._image_for_llm(comic.image_url)
+        alt_text_info = f"Alt text: {comic.description}"
         system_prompt_text = """
         You are a witty {comic_name} explainer. 
         Analyze the provided comic and output the response in JSON format.
@@ -140,24 +1036,286 @@ class Scraper(ABC):
             format_instructions=output_parser.get_format_instructions()
         )
 
-        chain = prompt_with_instructions | self.llm | output_parser
+        usage = UsageMetadataCallbackHandler()
+        try:
+            # the parser yields the partially parsed JSON as tokens arrive
+            result = {}
+            with self.metrics.time("llm", self.comic_name):
+                started = time.perf_counter()
+                async with asyncio.timeout(self.llm_timeout):
+                    async for result in self._hedged_stream(
+                        prompt_with_instructions,
+                        output_parser,
+                        {
+                            "image_url": image_url,
+                            "alt_text_info": alt_text_info,
+                            "comic_name": self.comic_name,
+                        },
+                        {"callbacks": [usage]},
+                        hedge,
+                    ):
+                        if started is not None:
+                            self.metrics.observe(
+                                "llm_first_token",
+                                self.comic_name,
+                                time.perf_counter() - started,
+                            )
+                            started = None
+                        await self._notify_partial(key, result)
+                for model_usage in usage.usage_metadata.values():
+                    self.metrics.count_tokens(
+                        self.comic_name,
+                        model_usage.get("input_tokens", 0),
+                        model_usage.get("output_tokens", 0),
+                    )
+                missing = ComicAnalysis.model_fields.keys() - result.keys()
+                if missing:
+                    raise ValueError(f"Incomplete analysis, missing {sorted(missing)}")
+            return result
+        except TimeoutError:
+            (
+                self.logger.error(
+                    "%s: LLM call timed out after %ss",
+                    self.comic_name,
+                    self.llm_timeout,
+                )
+                if self.logger
+                else None
+            )
+            return {"Core_concept": "Error", "Explanation": "Failed to parse analysis."}
+        except Exception as e:
+            (
+                self.logger.error("Error generating response: %s", e)
+                if self.logger
+                else None
+            )
+            return {"Core_concept": "Error", "Explanation": "Failed to parse analysis."}
+
+    async def _hedged_stream(
+        self, prompt, output_parser, inputs: dict, config: dict, hedge: bool
+    ):
+        """
+        Stream the parsed analysis from `llm`, hedged with `alternate_llm`.
+
+        If the primary model has not produced its first chunk within the hedge
+        delay, or fails before then, the same request is sent to the alternate
+        model. The stream that answers first is passed on and the other one is
+        cancelled; only if both fail is the primary's error raised.
+
+        The hedge takes a scheduler slot and tokens of its own, and is skipped
+        when none is free at once, so a slow, overloaded upstream does not get
+        more requests than the scheduler allows.
+        """
+        streams: dict[asyncio.Task, object] = {}
+
+        def start(llm) -> asyncio.Task:
+            stream = (prompt | llm | output_parser).astream(inputs, config=config)
+            task = asyncio.ensure_future(anext(stream))
+            streams[task] = stream
+            return task
 
+        primary = start(self.llm)
+        alternate_llm = self.alternate_llm if hedge else None
+        winner = None
+        hedge_slot = False
         try:
-            result = await chain.ainvoke(
+            if alternate_llm is not None:
+                delay = self._hedge_delay()
+                await asyncio.wait({primary}, timeout=delay)
+                slow = not primary.done() or primary.exception() is not None
+                if slow and self._acquire_hedge_slot():
+                    hedge_slot = self.llm_scheduler is not None
+                    (
+                        self.logger.info(
+                            "%s: %s %s, hedging with %s",
+                            self.comic_name,
+                            self.llm.model_name,
+                            (
+                                f"failed ({primary.exception()!r})"
+                                if primary.done()
+                                else f"gave no answer within {delay:.1f}s"
+                            ),
+                            alternate_llm.model_name,
+                        )
+                        if self.logger
+                        else None
+                    )
+                    self.metrics.observe("llm_hedge", self.comic_name, delay)
+                    start(alternate_llm)
+                elif slow:
+                    (
+                        self.logger.info(
+                            "%s: LLM scheduler busy, not hedging", self.comic_name
+                        )
+                        if self.logger
+                        else None
+                    )
+
+            pending = set(streams)
+            while winner is None and pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                # prefer the primary when both answered at once
+                for task in sorted(done, key=lambda task: task is not primary):
+                    if task.exception() is None:
+                        winner = task
+                        break
+            if winner is None:
+                raise primary.exception()
+
+            if winner is not primary:
+                (
+                    self.logger.info(
+                        "%s: Hedged request to %s answered first",
+                        self.comic_name,
+                        alternate_llm.model_name,
+                    )
+                    if self.logger
+                    else None
+                )
+            yield winner.result()
+            async for chunk in streams[winner]:
+                yield chunk
+        finally:
+            for task, stream in streams.items():
+                if task is not winner:
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+                await stream.aclose()
+            if hedge_slot:
+                self.llm_scheduler.release()
+
+    def _acquire_hedge_slot(self) -> bool:
+        if self.llm_scheduler is None:
+            return True
+        return self.llm_scheduler.try_acquire(ESTIMATED_TOKENS_PER_DESCRIPTION)
+
+    def _hedge_delay(self) -> float:
+        p95 = self.metrics.percentile(
+            "llm_first_token",
+            self.comic_name,
+            HEDGE_QUANTILE,
+            min_samples=HEDGE_MIN_SAMPLES,
+        )
+        return max(p95 or 0.0, self.llm_hedge_min_delay)
+
+    async def _generate_batch_description(
+        self, comics: list[ComicData]
+    ) -> list[dict | None]:
+        """
+        Explain `comics` in one LLM request answered with a JSON array.
+
+        Returns one analysis per comic, in order, with None for each comic
+        whose analysis is missing or invalid. When the answer cannot be lined
+        up with the comics (cut off, not complete JSON, not an array, or the
+        wrong length), every comic gets None, since an explanation could
+        otherwise land on the wrong one or be cached half-written.
+        """
+        from langchain_core.callbacks import UsageMetadataCallbackHandler
+        from langchain_core.messages import HumanMessage, SystemMessage
+        from langchain_core.output_parsers import JsonOutputParser
+        from langchain_core.utils.json import parse_json_markdown
+
+        output_parser = JsonOutputParser(pydantic_object=ComicAnalysis)
+        system_prompt_text = f"""
+        You are a witty {self.comic_name} explainer. 
+        Analyze each of the {len(comics)} provided comics and output the response
+        as a JSON array holding one object per comic, in the order given.
+
+        Structure each object according to the instructions below:
+        {output_parser.get_format_instructions()}
+
+        Keep each explanation concise and accessible.
+        """
+
+        image_urls = await asyncio.gather(
+            *(self._image_for_llm(comic.image_url) for comic in comics)
+        )
+        content = []
+        for number, (comic, image_url) in enumerate(zip(comics, image_urls), 1):
+            content.append(
                 {
-                    "image_url": image_url,
-                    "alt_text_info": alt_text_info,
-                    "comic_name": self.comic_name,
+                    "type": "text",
+                    "text": f"Comic {number} of {len(comics)}. "
+                    f"Alt text: {comic.description}",
                 }
             )
-            return result
+            content.append({"type": "image_url", "image_url": {"url": image_url}})
+
+        # the output budget of one analysis would cut the array off
+        llm = self.llm.bind(max_tokens=MAX_TOKENS_PER_ANALYSIS * len(comics))
+        usage = UsageMetadataCallbackHandler()
+        try:
+            with self.metrics.time("llm_batch", self.comic_name):
+                async with asyncio.timeout(self.llm_timeout):
+                    message = await llm.ainvoke(
+                        [SystemMessage(system_prompt_text), HumanMessage(content)],
+                        config={"callbacks": [usage]},
+                    )
+            for model_usage in usage.usage_metadata.values():
+                self.metrics.count_tokens(
+                    self.comic_name,
+                    model_usage.get("input_tokens", 0),
+                    model_usage.get("output_tokens", 0),
+                )
+            if message.response_metadata.get("finish_reason") == "length":
+                raise ValueError("Answer cut off at the output token limit")
+            # strict parsing: a partial parse would accept a truncated array
+            result = parse_json_markdown(message.content, parser=json.loads)
+            if not isinstance(result, list) or len(result) != len(comics):
+                raise ValueError(
+                    f"Expected a JSON array of {len(comics)} analyses, "
+                    f"got {type(result).__name__}"
+                    + (f" of {len(result)}" if isinstance(result, list) else "")
+                )
         except Exception as e:
             (
-                self.logger.error(f"Error generating response: {e}")
+                self.logger.error(
+                    "%s: Error generating batch response: %r", self.comic_name, e
+                )
                 if self.logger
                 else None
             )
-            return {"Core_concept": "Error", "Explanation": "Failed to parse analysis."}
+            return [None] * len(comics)
+
+        analyses = []
+        for comic, analysis in zip(comics, result):
+            try:
+                analyses.append(ComicAnalysis.model_validate(analysis).model_dump())
+            except ValueError as e:
+                (
+                    self.logger.warning(
+                        "%s: Invalid batch analysis for %s: %s",
+                        self.comic_name,
+                        comic.source_url,
+                        e,
+                    )
+                    if self.logger
+                    else None
+                )
+                analyses.append(None)
+        return analyses
+
+    async def _notify_partial(self, key: tuple, partial: dict):
+        for on_partial in list(self._partial_listeners.get(key, ())):
+            try:
+                await on_partial(partial)
+            except Exception as e:
+                # a failing listener must not abort the explanation itself
+                (
+                    self.logger.warning(
+                        "%s: Partial explanation listener failed: %s",
+                        self.comic_name,
+                        e,
+                    )
+                    if self.logger
+                    else None
+                )
+
 
-    def get_comic_source_url(self):
-        return self.url
+def preload_llm_modules():
+    """Import the LLM client modules ahead of the first explanation."""
+    import langchain_core.output_parsers
+    import langchain_core.prompts
+    import langchain_groq
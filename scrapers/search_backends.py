@@ -0,0 +1,99 @@
+import asyncio
+import functools
+import importlib
+import json
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+# blocking search clients run here so they never stall the event loop
+SEARCH_THREAD_POOL_SIZE = 4
+_search_executor = ThreadPoolExecutor(
+    max_workers=SEARCH_THREAD_POOL_SIZE, thread_name_prefix="search"
+)
+# provider clients are slow to import, so only the engine in use is loaded
+ENGINE_MODULES = {
+    "google": ("langchain_google_community",),
+    "duckduckgo": (
+        "langchain_community.tools",
+        "langchain_community.utilities",
+        "ddgs.exceptions",
+    ),
+}
+
+
+class SearchBackend(ABC):
+    """
+    Async interface to a web search engine.
+
+    Implementations are built once and reused for every query. Providers that
+    only offer a blocking client run it on a small shared thread pool, so a
+    slow search never blocks gateway heartbeats or other interactions.
+    """
+
+    @abstractmethod
+    async def search(self, query: str, site: str) -> str | None:
+        """Return the link of the top result for `query` on `site`, if any."""
+        pass
+
+    @staticmethod
+    async def _run_blocking(fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _search_executor, functools.partial(fn, *args, **kwargs)
+        )
+
+
+class GoogleSearchBackend(SearchBackend):
+    def __init__(self, google_cse_id: str):
+        from langchain_google_community import GoogleSearchAPIWrapper
+
+        self._wrapper = GoogleSearchAPIWrapper(google_cse_id=google_cse_id)
+
+    async def search(self, query: str, site: str) -> str | None:
+        # the custom search engine is already restricted to the comic's site
+        # k=1 ensures we just get the top result
+        results = await self._run_blocking(self._wrapper.results, query, num_results=1)
+        if results:
+            return results[0].get("link")
+        return None
+
+
+class DuckDuckGoSearchBackend(SearchBackend):
+    def __init__(self):
+        from langchain_community.tools import DuckDuckGoSearchResults
+        from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
+
+        wrapper = DuckDuckGoSearchAPIWrapper(
+            region="us-en", source="text", safesearch="off", max_results=3
+        )
+        self._search = DuckDuckGoSearchResults(
+            api_wrapper=wrapper, output_format="json", num_results=1
+        )
+
+    async def search(self, query: str, site: str) -> str | None:
+        from ddgs.exceptions import DDGSException
+
+        try:
+            results = json.loads(
+                await self._run_blocking(self._search.invoke, f"{query} site:{site}")
+            )
+        except DDGSException:
+            # raised by ddgs when there are no results
+            return None
+        if results:
+            return results[0]["link"]
+        return None
+
+
+def create_search_backend(engine: str, google_cse_id: str) -> SearchBackend | None:
+    if engine == "google":
+        return GoogleSearchBackend(google_cse_id=google_cse_id)
+    elif engine == "duckduckgo":
+        return DuckDuckGoSearchBackend()
+    return None
+
+
+def preload_search_backend(engine: str):
+    """Import the client modules of `engine` ahead of the first search."""
+    for module in ENGINE_MODULES.get(engine, ()):
+        importlib.import_module(module)
@@ -0,0 +1,45 @@
+import re
+from cachetools import TTLCache
+
+
+class SearchResultCache:
+    """
+    In-memory TTL+LRU cache of resolved web search results.
+
+    Keys are the normalized query, the source's search domain and the search
+    engine; values are the resolved comic URL. Queries without a result are
+    cached too, for a shorter time, so repeated misses skip the engine round
+    trip as well.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 86400, negative_ttl=900):
+        self._results = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._no_results = TTLCache(maxsize=maxsize, ttl=negative_ttl)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(query: str, search_domain: str, engine: str) -> tuple:
+        return normalize_query(query), search_domain, engine
+
+    def get(self, key: tuple) -> tuple[bool, str | None]:
+        """Return (found, url); url is None for a cached "no results"."""
+        if key in self._results:
+            self.hits += 1
+            return True, self._results[key]
+        if key in self._no_results:
+            self.hits += 1
+            return True, None
+        self.misses += 1
+        return False, None
+
+    def set(self, key: tuple, url: str | None):
+        if url is None:
+            self._no_results[key] = True
+        else:
+            self._no_results.pop(key, None)
+            self._results[key] = url
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(re.findall(r"\w+", query.lower()))
@@ -0,0 +1,127 @@
+import asyncio
+import re
+from scrapers.sqlite_store import SqliteStore
+
+_FIELDS = ("title", "alt_text", "transcript", "explanation")
+# bm25 column weights for (source, url, title, alt_text, transcript, explanation)
+_WEIGHTS = (0.0, 0.0, 10.0, 4.0, 2.0, 1.0)
+
+
+class SearchIndex(SqliteStore):
+    """
+    Local full-text index of comics, ranked with BM25.
+
+    Documents are keyed by comic URL and hold the title, alt text, transcript
+    and cached explanation of a comic. Fields are merged as they become known,
+    so a comic first indexed from the catalog later gains its explanation. The
+    index is a SQLite FTS5 table using the porter stemmer, so queries such as
+    "sql injection" match "SQL Injections" and prefixes match longer words.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path, timeout=10)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS documents (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL UNIQUE,
+                source TEXT NOT NULL,
+                title TEXT,
+                alt_text TEXT,
+                transcript TEXT,
+                explanation TEXT
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+                source UNINDEXED,
+                url UNINDEXED,
+                title,
+                alt_text,
+                transcript,
+                explanation,
+                tokenize = 'porter unicode61'
+            )
+            """
+        )
+        self._conn.commit()
+
+    async def add(self, source: str, url: str, **fields):
+        """Index a comic, merging `fields` (title, alt_text, ...) into what is known."""
+        await asyncio.to_thread(self._add_many, [(source, url, fields)])
+
+    async def add_many(self, documents: list[tuple[str, str, dict]]):
+        await asyncio.to_thread(self._add_many, documents)
+
+    async def search(self, source: str, query: str, limit: int = 1) -> list[str]:
+        """Return the URLs of the best matching comics of `source`, best first."""
+        match = build_match_expression(query)
+        if not match:
+            return []
+        return await asyncio.to_thread(self._search, source, match, limit)
+
+    # =================================================
+    # The following is blocking helpers run in a worker thread
+    # =================================================
+
+    def _add_many(self, documents: list[tuple[str, str, dict]]):
+        with self._lock:
+            for source, url, fields in documents:
+                self._upsert(source, url, fields)
+            self._conn.commit()
+
+    def _upsert(self, source: str, url: str, fields: dict):
+        row = self._conn.execute(
+            f"SELECT id, {', '.join(_FIELDS)} FROM documents WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            doc_id, current = None, dict.fromkeys(_FIELDS)
+        else:
+            doc_id, current = row[0], dict(zip(_FIELDS, row[1:]))
+
+        merged = {
+            name: fields[name] if fields.get(name) else current[name]
+            for name in _FIELDS
+        }
+        if doc_id is not None and merged == current:
+            return
+
+        values = [merged[name] for name in _FIELDS]
+        if doc_id is None:
+            doc_id = self._conn.execute(
+                f"INSERT INTO documents (url, source, {', '.join(_FIELDS)}) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, source, *values),
+            ).lastrowid
+        else:
+            self._conn.execute(
+                f"UPDATE documents SET {', '.join(f'{n} = ?' for n in _FIELDS)} "
+                "WHERE id = ?",
+                (*values, doc_id),
+            )
+            self._conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (doc_id,))
+
+        self._conn.execute(
+            f"INSERT INTO documents_fts (rowid, source, url, {', '.join(_FIELDS)}) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (doc_id, source, url, *values),
+        )
+
+    def _search(self, source: str, match: str, limit: int) -> list[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url FROM documents_fts "
+                "WHERE documents_fts MATCH ? AND source = ? "
+                f"ORDER BY bm25(documents_fts, {', '.join(map(str, _WEIGHTS))}) "
+                "LIMIT ?",
+                (match, source, limit),
+            ).fetchall()
+        return [url for (url,) in rows]
+
+
+def build_match_expression(query: str) -> str:
+    """Turn free text into an FTS5 query requiring every word, as a prefix."""
+    words = re.findall(r"\w+", query.lower())
+    return " ".join(f'"{word}"*' for word in words)
@@ -0,0 +1,34 @@
+import os
+import sqlite3
+import threading
+
+
+class SqliteStore:
+    """
+    Base class of the SQLite-backed stores under the cache directory.
+
+    Opens the database at `path`, creating its directory, in WAL mode so
+    readers do not wait for a writer. The connection is shared between
+    threads: subclasses run their queries in a worker thread with
+    `asyncio.to_thread`, holding `_lock` for every use of `_conn`, so the
+    event loop never waits on SQLite.
+    """
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=timeout)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def normalize_url(url: str) -> str:
+    """Comic URLs are stored and compared without a trailing slash."""
+    return str(url).rstrip("/")
@@ -3,17 +3,20 @@ import asyncio
 import re
 import random
 import json
-from bs4 import BeautifulSoup
-from objects.comic_object import ComicData
+from objects.comic_object import CatalogEntry, ComicData
+from scrapers.html_extract import extract_image
 from scrapers.scraper import Scraper
 from urllib.parse import urljoin
 
 
 class TurnOffUsScraper(Scraper):
 
-    def __init__(self, config, logger=None):
+    def __init__(self, config, logger=None, **kwargs):
         super().__init__(
-            google_cse_id=config["TURNOFFUS_CSE_ID"], config=config, logger=logger
+            google_cse_id=config["TURNOFFUS_CSE_ID"],
+            config=config,
+            logger=logger,
+            **kwargs,
         )
 
     @property
@@ -26,104 +29,117 @@ class TurnOffUsScraper(Scraper):
 
     @property
     async def random_comic_url(self):
-        async with aiohttp.ClientSession() as session:
-            async with session.get("https://turnoff.us/") as response:
-                response.raise_for_status()
+        try:
+            html = (await self._get_cached(self.latest_comic_url)).text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            (
+                self.logger.error("turnoff.us: Error fetching random comic: %s", e)
+                if self.logger
+                else None
+            )
+            return None
+
+        pattern = re.compile(r"var pages = (\[.*?\]);", re.DOTALL)
+        match = pattern.search(html)
+
+        if match:
+            pages_str = match.group(1)
+            pages = json.loads(pages_str)
+
+            if pages:
+                base_url = "https://turnoff.us/"
+                random_path = random.choice(pages)
+                full_url = urljoin(base_url, random_path)
+                return full_url
+            else:
+                return None
+
+        else:
+            (
+                self.logger.error("turnoff.us: Cannot get random comic URL.")
+                if self.logger
+                else None
+            )
+            return None
 
-                html = await response.text()
+    @property
+    def latest_comic_url(self):
+        return "https://turnoff.us/"
 
-                pattern = re.compile(r"var pages = (\[.*?\]);", re.DOTALL)
-                match = pattern.search(html)
+    async def _fetch_catalog_listing(
+        self, max_age: float | None = None
+    ) -> list[CatalogEntry]:
+        html = (await self._get_cached(self.latest_comic_url, max_age)).text()
 
-                if match:
-                    pages_str = match.group(1)
-                    pages = json.loads(pages_str)
+        match = re.search(r"var pages = (\[.*?\]);", html, re.DOTALL)
+        if not match:
+            raise ValueError("Cannot find the list of pages on the homepage.")
 
-                    if pages:
-                        base_url = "https://turnoff.us/"
-                        random_path = random.choice(pages)
-                        full_url = urljoin(base_url, random_path)
-                        return full_url
-                    else:
-                        return None
+        # the homepage lists the archive newest first
+        base_url = "https://turnoff.us/"
+        return [
+            CatalogEntry(slug=path, url=urljoin(base_url, path))
+            for path in json.loads(match.group(1))
+        ]
 
+    async def _fetch_content(self, url: str) -> ComicData | None:
+        try:
+            # fetch the raw HTML
+            with self.metrics.time("page_fetch", self.comic_name):
+                if url == self.latest_comic_url:
+                    cached = await self._get_cached(url)
+                    comic_url, html = cached.final_url, cached.body
+                else:
+                    async with self.session.get(url) as response:
+                        response.raise_for_status()  # Check for HTTP errors
+
+                        comic_url = str(response.url)
+                        html = await response.read()
+
+            with self.metrics.time("parse", self.comic_name):
+                article, img_tag = await extract_image(html, "article", "post-content")
+            # Return the second image URL (format: {'src': 'https://...', 'alt':'})
+            if article:
+                if img_tag:
+                    base_url = "https://turnoff.us/"
+                    image_url = urljoin(base_url, img_tag["src"])
+                    alt_text = img_tag["alt"]
+                    comic_data = ComicData(
+                        title=alt_text,
+                        description=alt_text,
+                        image_url=image_url,
+                        source_url=comic_url,
+                        source_name=self.comic_name,
+                    )
+                    (
+                        self.logger.info("turnoff.us: Fetched comic: %s", comic_data)
+                        if self.logger
+                        else None
+                    )
+                    return comic_data
                 else:
                     (
-                        self.logger.error("turnoff.us: Cannot get random comic URL.")
+                        self.logger.error("turnoff.us: Cannot find image tag.")
                         if self.logger
                         else None
                     )
                     return None
-
-    @property
-    def latest_comic_url(self):
-        return "https://turnoff.us/"
-
-    async def random_comic(self):
-        return await self._fetch_content(await self.random_comic_url)
-
-    async def _fetch_content(self, url: str) -> ComicData | None:
-        async with aiohttp.ClientSession() as session:
-            try:
-                # fetch the raw HTML
-                async with session.get(url) as response:
-                    response.raise_for_status()  # Check for HTTP errors
-
-                    self.url = response.url
-                    html = await response.text()
-                    soup = BeautifulSoup(html, "lxml")
-                    # Return the second image URL (format: {'src': 'https://...', 'alt':'})
-                    article = soup.find("article", class_="post-content")
-                    if article:
-                        img_tag = article.find("img")
-                        if img_tag:
-                            base_url = "https://turnoff.us/"
-                            self.src = urljoin(base_url, img_tag["src"])
-                            self.alt = img_tag["alt"]
-                            if self.src[-4:] == ".gif":
-                                random_url = urljoin(
-                                    base_url, soup.find(id="random-link")["href"]
-                                )
-                                return await self._fetch_content(random_url)
-
-                            comic_data = ComicData(
-                                title=self.alt,
-                                description=self.alt,
-                                image_url=self.src,
-                                source_url=str(self.url),
-                                source_name=self.comic_name,
-                            )
-                            (
-                                self.logger.info(
-                                    f"turnoff.us: Fetched comic: {comic_data}"
-                                )
-                                if self.logger
-                                else None
-                            )
-                            return comic_data
-                        else:
-                            (
-                                self.logger.error("turnoff.us: Cannot find image tag.")
-                                if self.logger
-                                else None
-                            )
-                            return None
-                    else:
-                        (
-                            self.logger.error("turnoff.us: Cannot find article tag.")
-                            if self.logger
-                            else None
-                        )
-                        return None
-
-            except aiohttp.ClientError as e:
+            else:
                 (
-                    self.logger.error(f"turnoff.us: Error fetching URL: {e}")
+                    self.logger.error("turnoff.us: Cannot find article tag.")
                     if self.logger
                     else None
                 )
                 return None
 
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            (
+                self.logger.error("turnoff.us: Error fetching URL: %s", e)
+                if self.logger
+                else None
+            )
+            return None
+
 
 # Run the async function
 if __name__ == "__main__":
@@ -131,6 +147,11 @@ if __name__ == "__main__":
 
     config = {**dotenv_values("../.env.secret"), **dotenv_values("../.env.public")}
     turnoff_us_scraper = TurnOffUsScraper(config=config)
-    # asyncio.run(turnoff_us_scraper.search_comic("unzip"))
-    asyncio.run(turnoff_us_scraper.random_comic())
-    asyncio.run(turnoff_us_scraper.describe_comic())
+
+    async def run():
+        # await turnoff_us_scraper.search_comic("unzip")
+        comic = await turnoff_us_scraper.random_comic()
+        await turnoff_us_scraper.describe_comic(comic)
+        await turnoff_us_scraper.close()
+
+    asyncio.run(run())
@@ -1,14 +1,24 @@
 import aiohttp
 import asyncio
+import re
 from urllib.parse import urljoin
-from objects.comic_object import ComicData
+from objects.comic_object import CatalogEntry, ComicData, is_animated_image
 from scrapers.scraper import Scraper
 
+# canonical comic pages, whose JSON can be fetched without resolving the page first
+COMIC_PAGE_PATTERN = re.compile(r"^https?://(www\.)?xkcd\.com/(\d+/?)?$")
+# xkcd deliberately has no comic 404
+MISSING_COMIC_NUMBERS = {404}
+# metadata of the latest comic, served through the HTTP cache
+LATEST_INFO_URL = "https://xkcd.com/info.0.json"
+# comics before the latest listed for the release watcher
+RELEASE_LOOKBACK = 10
+
 
 class XkcdScraper(Scraper):
-    def __init__(self, config, logger=None):
+    def __init__(self, config, logger=None, **kwargs):
         super().__init__(
-            google_cse_id=config["XKCD_CSE_ID"], config=config, logger=logger
+            google_cse_id=config["XKCD_CSE_ID"], config=config, logger=logger, **kwargs
         )
 
     @property
@@ -27,50 +37,95 @@ class XkcdScraper(Scraper):
     def latest_comic_url(self):
         return "https://xkcd.com/"
 
-    async def _fetch_content(self, url: str) -> ComicData | None:
-        async with aiohttp.ClientSession() as session:
-            try:
-                # fetch the raw HTML
-                async with session.get(url) as response:
-                    response.raise_for_status()  # Check for HTTP errors
-
-                    self.url = response.url
-
-                async with session.get(f"{self.url}/info.0.json") as response:
-                    comic_json = await response.json()
-
-                    # Return the second image URL (format: {'src': 'https://...', 'alt':'})
-                    base_url = "https://xkcd.com/"
-                    full_url = urljoin(base_url, str(comic_json["num"]))
-                    self.url = full_url
-                    self.src = comic_json["img"]
-                    self.alt = comic_json["alt"]
-                    if self.src[-4:] == ".gif":
-                        return await self._fetch_content(
-                            "https://c.xkcd.com/random/comic/"
-                        )
-
-                    comic_data = ComicData(
-                        title=comic_json["title"],
-                        description=self.alt,
-                        image_url=self.src,
-                        source_url=self.url,
-                        source_name=self.comic_name,
-                    )
-                    (
-                        self.logger.info(f"xkcd.com: Fetched comic: {comic_data}")
-                        if self.logger
-                        else None
-                    )
-                    return comic_data
+    async def _fetch_catalog_listing(
+        self, max_age: float | None = None
+    ) -> list[CatalogEntry]:
+        return await self._list_from_latest(max_age)
 
-            except aiohttp.ClientError as e:
-                (
-                    self.logger.error(f"xkcd.com: Error fetching URL: {e}")
-                    if self.logger
-                    else None
+    async def _fetch_release_listing(self) -> list[CatalogEntry]:
+        # only the latest comic's JSON is polled, not the whole archive
+        return await self._list_from_latest(max_age=0, lookback=RELEASE_LOOKBACK)
+
+    async def _list_from_latest(
+        self, max_age: float | None, lookback: int | None = None
+    ) -> list[CatalogEntry]:
+        latest_json = (await self._get_cached(LATEST_INFO_URL, max_age)).json()
+
+        latest = latest_json["num"]
+        listing = [
+            CatalogEntry(
+                slug=str(latest),
+                url=urljoin("https://xkcd.com/", str(latest)),
+                ordinal=latest,
+                title=latest_json["title"],
+                image_url=latest_json["img"],
+                alt_text=latest_json["alt"],
+                animated=is_animated_image(latest_json["img"]),
+            )
+        ]
+        # every number up to the latest is a comic, so the rest of the archive is
+        # known without fetching it; details are filled in later. The release
+        # watcher only needs the last few numbers, known or not
+        oldest = max(latest - lookback, 0) if lookback is not None else 0
+        for num in range(latest - 1, oldest, -1):
+            if num in MISSING_COMIC_NUMBERS:
+                continue
+            if lookback is not None or self.catalog.get(str(num)) is None:
+                listing.append(
+                    CatalogEntry(
+                        slug=str(num),
+                        url=urljoin("https://xkcd.com/", str(num)),
+                        ordinal=num,
+                    )
                 )
-                return None
+        return listing
+
+    async def _fetch_content(self, url: str) -> ComicData | None:
+        try:
+            comic_url = url
+            with self.metrics.time("page_fetch", self.comic_name):
+                if not COMIC_PAGE_PATTERN.match(url):
+                    # fetch the raw HTML to resolve redirects (e.g. the random comic page)
+                    async with self.session.get(url) as response:
+                        response.raise_for_status()  # Check for HTTP errors
+
+                        comic_url = str(response.url)
+
+                info_url = f"{comic_url.rstrip('/')}/info.0.json"
+                if info_url == LATEST_INFO_URL:
+                    comic_json = (await self._get_cached(info_url)).json()
+                else:
+                    async with self.session.get(info_url) as response:
+                        response.raise_for_status()
+                        comic_json = await response.json()
+
+            # Return the second image URL (format: {'src': 'https://...', 'alt':'})
+            base_url = "https://xkcd.com/"
+            comic_url = urljoin(base_url, str(comic_json["num"]))
+            image_url = comic_json["img"]
+            alt_text = comic_json["alt"]
+            comic_data = ComicData(
+                title=comic_json["title"],
+                description=alt_text,
+                image_url=image_url,
+                source_url=comic_url,
+                source_name=self.comic_name,
+                transcript=comic_json.get("transcript") or None,
+            )
+            (
+                self.logger.info("xkcd.com: Fetched comic: %s", comic_data)
+                if self.logger
+                else None
+            )
+            return comic_data
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            (
+                self.logger.error("xkcd.com: Error fetching URL: %s", e)
+                if self.logger
+                else None
+            )
+            return None
 
 
 # Run the async function
@@ -80,5 +135,9 @@ if __name__ == "__main__":
     config = {**dotenv_values("../.env.secret"), **dotenv_values("../.env.public")}
     target_url = "https://c.xkcd.com/random/comic/"
     xkcd_scraper = XkcdScraper(config=config)
-    asyncio.run(xkcd_scraper.search_comic("sql injection"))
-    # asyncio.run(xkcd_scraper.describe_comic())
+
+    async def run():
+        await xkcd_scraper.search_comic("sql injection")
+        await xkcd_scraper.close()
+
+    asyncio.run(run())